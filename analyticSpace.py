@@ -0,0 +1,165 @@
+# analyticSpace.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the analytic computation of the configuration space obstacles.
+For a link rotating about a known joint, the angles where it touches a padded circle
+form one interval, solved in closed form and rasterized onto the angle lattice.
+Only the cells near an interval end are classified with the sampled test, so the
+result matches the sampled classification of cspace.py exactly.
+"""
+
+import numpy as np
+from const import *
+from cspace import getLatticeAngles, computeArmPosGrid, computeOffsetGrid, buildGrid
+from geometry import findDistArray
+import stats
+
+# The link end is truncated toward zero on both axes, so it is less than sqrt(2) from the exact end.
+# Moving a segment end by e moves its distance to a point by at most e, cells whose exact distance
+# is within BAND of the padded radius are classified with the sampled test.
+BAND = 1.5
+
+
+def getHalfWidth(d, length, radius):
+    """Compute the largest angle between a link and the direction of a circle where the link touches it.
+
+        Args:
+            d (array): distance from the joint of the link to the circle center
+            length (int): length of the arm link
+            radius (float): radius of the circle, grown by the link padding
+
+        Return:
+            array of half widths in degree, 180 if the joint is in the circle, -1 if the circle is out of reach
+    """
+    d = np.asarray(d, dtype=float)
+    halfWidth = np.full(d.shape, -1.0)
+    if radius < 0:
+        return halfWidth
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # tangent to the side of the link, or touching its end
+        side = np.degrees(np.arcsin(np.clip(radius / d, -1, 1)))
+        tip = np.degrees(np.arccos(np.clip((d ** 2 + length ** 2 - radius ** 2) / (2 * d * length), -1, 1)))
+    tangent = d ** 2 - radius ** 2 <= length ** 2
+    halfWidth = np.where(d <= length + radius, np.where(tangent, side, tip), halfWidth)
+    return np.where(d <= radius, 180.0, halfWidth)
+
+
+def rasterizeIntervals(center, halfWidth, angles):
+    """Mark the lattice angles within halfWidth of center, modulo 360.
+
+        Args:
+            center (array): center angle of the interval of every row, in degree
+            halfWidth (array): half width of the interval of every row, negative for no interval
+            angles (array): increasing lattice angles, evenly spaced
+
+        Return:
+            boolean array of shape (rows, number of angles)
+    """
+    count = len(angles)
+    step = angles[1] - angles[0] if count > 1 else 1
+    rows = np.flatnonzero(halfWidth >= 0)
+    diff = np.zeros((len(center), count + 1), dtype=np.int32)
+    if len(rows) == 0:
+        return diff[:, :count] > 0
+
+    center = center[rows]
+    halfWidth = halfWidth[rows]
+    first = int(np.floor((angles[0] - center.max() - 180) / 360))
+    last = int(np.ceil((angles[-1] - center.min() + 180) / 360))
+    for turn in range(first, last + 1):
+        low = np.ceil((center - halfWidth + 360 * turn - angles[0]) / step).astype(np.int64)
+        high = np.floor((center + halfWidth + 360 * turn - angles[0]) / step).astype(np.int64)
+        low = np.maximum(low, 0)
+        high = np.minimum(high, count - 1)
+        valid = low <= high
+        np.add.at(diff, (rows[valid], low[valid]), 1)
+        np.add.at(diff, (rows[valid], high[valid] + 1), -1)
+    return np.cumsum(diff, axis=1)[:, :count] > 0
+
+
+def getLinkMask(start, baseAngle, angles, length, pad, obstacles):
+    """Compute the cells where one link touches an obstacle, with the joint of the link fixed per row.
+
+        Args:
+            start (tuple): (x, y) integer arrays of the joint of the link, one entry per row
+            baseAngle (array): absolute angle of the previous link of every row
+            angles (array): lattice of the relative angle of the link
+            length (int): length of the link
+            pad (int): padding distance of the link
+            obstacles (list): [(x, y, r)] of obstacles
+
+        Return:
+            boolean array of shape (rows, number of angles)
+    """
+    startX, startY = start
+    blocked = np.zeros((len(startX), len(angles)), dtype=bool)
+    for obstacle in obstacles:
+        radius = obstacle[2] + pad
+        dx = obstacle[0] - startX
+        dy = obstacle[1] - startY
+        d = np.sqrt(dx ** 2 + dy ** 2)
+        if d.min() > length + radius + BAND:
+            continue
+        # the y axis points down, a link at angle 0 points along x and 90 points up
+        center = np.degrees(np.arctan2(-dy, dx)) - baseAngle
+        inner = rasterizeIntervals(center, getHalfWidth(d, length, radius - BAND), angles)
+        outer = rasterizeIntervals(center, getHalfWidth(d, length, radius + BAND), angles)
+        blocked |= inner
+
+        # cells near the interval ends get the sampled test on the truncated link end
+        rows, cols = np.nonzero(outer & ~inner & ~blocked)
+        if len(rows) == 0:
+            continue
+        offsetX, offsetY = computeOffsetGrid(length, (baseAngle[rows] + angles[cols]) % 360)
+        rowStart = (startX[rows], startY[rows])
+        rowEnd = (startX[rows] + offsetX, startY[rows] + offsetY)
+        hit = findDistArray(rowStart, rowEnd, obstacle) - obstacle[2] - pad <= 0
+        stats.count(stats.COLLISION_TESTS, len(rows))
+        blocked[rows[hit], cols[hit]] = True
+    return blocked
+
+
+def getObstacleGrid(arm, obstacles, granularity, rows=None):
+    """Compute the cells where the arm touches an obstacle, one link at a time.
+       Link k is solved for every configuration of the links before it, and the result is
+       repeated along the axes of the links after it. rows is an optional [start, end) range of alpha indices.
+
+        Return:
+            boolean array with one axis per arm link
+    """
+    angles = [getLatticeAngles(limit, granularity) for limit in arm.getArmLimit()]
+    if rows is not None:
+        angles[ALPHA] = angles[ALPHA][rows[0]:rows[1]]
+    shape = tuple(len(a) for a in angles)
+    lengths = arm.getArmLength()
+    distances = arm.getArmDistance()
+
+    blocked = np.zeros(shape, dtype=bool)
+    for link in range(len(shape)):
+        prefixShape = shape[:link]
+        angleGrids = [a.reshape([-1 if i == axis else 1 for i in range(link)])
+                      for axis, a in enumerate(angles[:link])]
+        if link == 0:
+            start = (np.array([arm.getBase()[0]], dtype=np.int64), np.array([arm.getBase()[1]], dtype=np.int64))
+            baseAngle = np.zeros(1, dtype=np.int64)
+        else:
+            armPos = computeArmPosGrid(arm.getBase(), lengths[:link], angleGrids)
+            start = tuple(np.broadcast_to(c, prefixShape).reshape(-1) for c in armPos[-1][1])
+            baseAngle = np.broadcast_to(sum(angleGrids, 0), prefixShape).reshape(-1)
+        linkMask = getLinkMask(start, baseAngle, angles[link], lengths[link], distances[link], obstacles)
+        blocked |= linkMask.reshape(prefixShape + (shape[link],) + (1,) * (len(shape) - link - 1))
+    return blocked
+
+
+def buildAnalyticGrid(arm, goals, obstacles, window, granularity, rows=None):
+    """Build the maze character grid with the analytic obstacle test, without the start cell.
+       The goal and window tests only look at the link ends and are run as in cspace.buildGrid.
+    """
+    grid = buildGrid(arm, goals, [], window, granularity, rows)
+    grid[getObstacleGrid(arm, obstacles, granularity, rows)] = ord(WALL_CHAR)
+    return grid
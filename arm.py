@@ -8,13 +8,18 @@
 # Created by Jongdeog Lee (jlee700@illinois.edu) on 09/12/2018
 
 """
-This file contains the Arm class
+This file contains the Arm class. The link positions are computed once per
+setArmAngle, only for the links whose base or angle changed.
 """
 
 from const import *
 from armLink import ArmLink
+from geometry import getOffsetTable, lookupCoordinate
 
 class Arm:
+    __slots__ = ('__armLinks', '__armRelativeAngle', '__armLimit', '__armLength', '__armDistance', '__offsets',
+                 '__armPos', '__armPosDist')
+
     def __init__(self, armBasePos, armLinkSpec):
 
         if len(armLinkSpec) > MAX_NUM_OF_ART_LINKS:
@@ -38,6 +43,33 @@ class Arm:
             armLink = ArmLink(base, length, totalRelativeAngle % 360, distance)
             self.__armLinks.append(armLink)
             base = armLink.getEnd()        
+        self.__armLength = [armLink.getLength() for armLink in self.__armLinks]
+        self.__armDistance = [armLink.getDistance() for armLink in self.__armLinks]
+        self.__offsets = [getOffsetTable(length) for length in self.__armLength]
+        self.__updateArmPos()
+
+    def clone(self):
+        """This function returns a copy of the arm that can be moved on its own.
+           The links are copied, the offset tables and the tuples of the positions are shared.
+        """
+        arm = Arm.__new__(Arm)
+        arm.__armLinks = [armLink.clone() for armLink in self.__armLinks]
+        arm.__armRelativeAngle = self.__armRelativeAngle[:]
+        arm.__armLimit = self.__armLimit[:]
+        arm.__armLength = self.__armLength
+        arm.__armDistance = self.__armDistance
+        arm.__offsets = self.__offsets
+        arm.__armPos = self.__armPos
+        arm.__armPosDist = self.__armPosDist
+        return arm
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    # Keeps (start, end) of all arm links, computed once per change of the angles
+    def __updateArmPos(self):
+        self.__armPos = [(armLink.getBase(), armLink.getEnd()) for armLink in self.__armLinks]
+        self.__armPosDist = [(start, end, distance) for (start, end), distance in zip(self.__armPos, self.__armDistance)]
 
 
     def getBase(self):
@@ -48,7 +80,7 @@ class Arm:
     def getEnd(self):
         """This function returns (x, y) of the arm tip
         """
-        return self.__armLinks[-1].getEnd()
+        return self.__armPos[-1][1]
 
     def getArmPos(self):
         """This function returns (start, end) of all arm links
@@ -56,10 +88,7 @@ class Arm:
            [ [(x1, y1), (x2, y2)], 
              [(x2, y2), (x3, y3)] ]
         """
-        info = []
-        for armLink in self.__armLinks:
-            info.append((armLink.getBase(), armLink.getEnd()))
-        return info
+        return list(self.__armPos)
     
     def getArmPosDist(self):
         """This function returns (start, end) of all arm links with the padding distance of the arm
@@ -67,8 +96,7 @@ class Arm:
            [ [(x1, y1), (x2, y2), distance], 
              [(x2, y2), (x3, y3), distance] ]
         """
-        info = [(armLink.getBase(), armLink.getEnd(), armLink.getDistance()) for armLink in self.__armLinks]
-        return info
+        return list(self.__armPosDist)
 
     def getArmAngle(self):
         """This function returns relative angles of all arm links.
@@ -76,6 +104,16 @@ class Arm:
         """
         return self.__armRelativeAngle
 
+    def getArmLength(self):
+        """This function returns the length of all arm links
+        """
+        return list(self.__armLength)
+
+    def getArmDistance(self):
+        """This function returns the padding distance of all arm links
+        """
+        return list(self.__armDistance)
+
     def getArmLimit(self):        
         """This function returns (min angle, max angle) of all arm links
         """
@@ -103,5 +141,35 @@ class Arm:
             self.__armLinks[i].setAngle(totalAngle % 360)
             self.__armLinks[i].setBase(base)
             base = self.__armLinks[i].getEnd()
+        self.__updateArmPos()
 
         return True
+
+    def computeArmPosDist(self, angles):
+        """This function returns getArmPosDist() of the arm at the angles (alpha, beta, gamma), without
+           moving the arm. One angle is needed per arm link.
+
+            Return:
+                [(start, end, distance)] of all arm links, None if an angle is out of its limit
+        """
+        info = []
+        base = self.getBase()
+        totalAngle = 0
+        for angle, limit, length, distance, offsets in zip(angles, self.__armLimit, self.__armLength,
+                                                           self.__armDistance, self.__offsets):
+            if angle < min(limit) or angle > max(limit):
+                return None
+            totalAngle += angle
+            end = lookupCoordinate(base, length, totalAngle % 360, offsets)
+            info.append((base, end, distance))
+            base = end
+        return info
+
+    def computeArmPos(self, angles):
+        """This function returns getArmPos() of the arm at the angles, without moving the arm.
+           None if an angle is out of its limit.
+        """
+        info = self.computeArmPosDist(angles)
+        if info is None:
+            return None
+        return [(start, end) for start, end, distance in info]
@@ -14,19 +14,39 @@ This file contains the ArmLink class
 from geometry import *
 
 class ArmLink:
+    __slots__ = ('__base', '__length', '__angle', '__distance', '__offsets', '__end')
+
     def __init__(self, base, length, angle, distance=0):
         # This angle is absolute angle, not alpha/beta/gamma
         self.__base = base
         self.__length = length        
         self.__angle = angle
         self.__distance = distance
+        self.__offsets = getOffsetTable(length)
+        self.__end = None
+
+    # Returns a copy of the link, sharing the offset table of its length
+    def clone(self):
+        armLink = ArmLink.__new__(ArmLink)
+        armLink.__base = self.__base
+        armLink.__length = self.__length
+        armLink.__angle = self.__angle
+        armLink.__distance = self.__distance
+        armLink.__offsets = self.__offsets
+        armLink.__end = self.__end
+        return armLink
 
+    # The end is kept until the base or the angle changes
     def setBase(self, base):
-        self.__base = base                
+        if base != self.__base:
+            self.__base = base
+            self.__end = None
 
     def setAngle(self, angle):
         # This angle is absolute angle, not alpha or beta or gamma        
-        self.__angle = angle             
+        if angle != self.__angle:
+            self.__angle = angle
+            self.__end = None
 
     def getBase(self):
         return self.__base
@@ -43,9 +63,11 @@ class ArmLink:
     def computeEnd(self):
         """This function computes the end position of this arm link for the given angle.
            Note that the angle here is counter-clockwise from the x-axis. 
+           Whole degrees from 0 to 359 are looked up in the offset table of the link length.
         """        
-        self.__end = computeCoordinate(self.__base, self.__length, self.__angle)
+        self.__end = lookupCoordinate(self.__base, self.__length, self.__angle, self.__offsets)
 
     def getEnd(self):
-        self.computeEnd()
-        return self.__end  
\ No newline at end of file
+        if self.__end is None:
+            self.computeEnd()
+        return self.__end
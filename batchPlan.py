@@ -0,0 +1,217 @@
+# batchPlan.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a headless entry point that plans many map configurations
+without pygame. Every scene is transformed and searched, and one JSON line with
+the path, the number of states explored and the timings is written per scene.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+from arm import Arm
+from transform import transformToMaze, validatePath
+from mazeCache import transformToMazeCached
+from search import search
+from sceneConfig import loadConfig, getScene
+from const import *
+import stats
+
+
+def loadScene(configfile, map_name):
+    """This function reads one map of a configuration file, as mp2.Application does.
+
+        Return:
+            (arm, goals, obstacles, window)
+    """
+    scene = getScene(configfile, map_name)
+    arm = Arm(scene['ArmBase'], scene['ArmLinks'])
+    return arm, scene['Goals'], scene['Obstacles'], scene['Window']
+
+
+def listScenes(configfiles, map_names=None):
+    """This function returns the (configfile, map_name) pairs to plan, every map of every file
+       if map_names is None, otherwise the given maps of the files that have them.
+    """
+    scenes = []
+    for configfile in configfiles:
+        for map_name in loadConfig(configfile):
+            if map_names is None or map_name in map_names:
+                scenes.append((configfile, map_name))
+    return scenes
+
+
+def checkArguments(parser, args):
+    """This function checks the command line once, before any scene is planned, and stops with
+       parser.error (exit status 2) on a bad option, an unreadable configuration file or a --map
+       name that is in none of the files.
+
+        Return:
+            list: the (configfile, map_name) pairs of listScenes
+    """
+    if any(granularity <= 0 for granularity in args.granularity):
+        parser.error("--granularity must be positive")
+    if args.levels < 1:
+        parser.error("--levels must be at least 1")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.levels > 1:
+        from multiResolution import getOptionsError
+        message = getOptionsError({"--method " + args.search: args.search != "bfs", "--lazy": args.lazy,
+                                   "--engine " + args.engine: args.engine != "vectorized", "--cache": args.cache})
+        if message is not None:
+            parser.error(message)
+
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages):
+            scenes = listScenes(args.configfiles, args.map_names)
+    except SystemExit:
+        parser.error(messages.getvalue().strip())
+    if args.map_names is not None:
+        missing = [name for name in args.map_names if name not in {map_name for _, map_name in scenes}]
+        if missing:
+            parser.error("no map " + ", ".join(missing) + " in " + ", ".join(args.configfiles))
+    if not scenes:
+        parser.error("no map in " + ", ".join(args.configfiles))
+    return scenes
+
+
+def planScene(task):
+    """This function transforms and searches one scene.
+
+        Args:
+            task (dict): configfile, map_name, granularity, method, engine, lazy, levels, cache, paths, stats
+                         and validate. With levels > 1, method, engine, lazy and cache must be left at their
+                         defaults, see checkArguments
+
+        Return:
+            dict: the record written as a JSON line. error holds the message of a scene that cannot be
+                  planned, like a maze without start. The messages printed while planning are not kept.
+    """
+    record = {"config": task["configfile"], "map": task["map_name"], "granularity": task["granularity"],
+              "method": task["method"], "engine": task["engine"], "levels": task["levels"], "lazy": task["lazy"]}
+    messages = io.StringIO()
+    if task["stats"]:
+        stats.enable()
+    try:
+        with contextlib.redirect_stdout(messages):
+            with stats.stage("parse"):
+                arm, goals, obstacles, window = loadScene(task["configfile"], task["map_name"])
+            transformStart = time.perf_counter()
+            statesExplored = None
+            if task["levels"] > 1:
+                from multiResolution import planCoarseToFine
+                path = planCoarseToFine(arm, goals, obstacles, window, task["granularity"], task["levels"])
+                transformTime = time.perf_counter() - transformStart
+                searchTime = 0.0
+            else:
+                if task["lazy"]:
+                    from lazyMaze import LazyMaze
+                    maze = LazyMaze(arm, goals, obstacles, window, task["granularity"])
+                elif task["cache"]:
+                    maze = transformToMazeCached(arm, goals, obstacles, window, task["granularity"],
+                                                 engine=task["engine"])
+                else:
+                    maze = transformToMaze(arm, goals, obstacles, window, task["granularity"], task["engine"])
+                transformTime = time.perf_counter() - transformStart
+                searchStart = time.perf_counter()
+                path, statesExplored = search(maze, task["method"])
+                searchTime = time.perf_counter() - searchStart
+    except SystemExit:
+        record["error"] = messages.getvalue().strip() or "planning stopped"
+        return record
+    finally:
+        recorded = stats.disable()
+
+    if recorded is not None:
+        record["stats"] = recorded.asDict()
+
+    record["found"] = path is not None
+    record["pathLength"] = len(path) if path is not None else None
+    record["statesExplored"] = statesExplored
+    record["transformTime"] = round(transformTime, 6)
+    record["searchTime"] = round(searchTime, 6)
+    if task["validate"]:
+        record["valid"] = (validatePath(arm, path, goals, obstacles, window, task["granularity"])
+                           if path is not None else None)
+    if task["paths"]:
+        record["path"] = [[int(angle) for angle in angles] for angles in path] if path is not None else None
+    return record
+
+
+def planScenes(tasks, jobs=None):
+    """This function plans the tasks in order, in a process pool when jobs is more than 1.
+
+        Return:
+            generator of records, in the order of the tasks
+    """
+    if jobs is not None and jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for record in executor.map(planScene, tasks):
+                yield record
+    else:
+        for task in tasks:
+            yield planScene(task)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='CS440 MP2 Robotic Arm - headless batch planning')
+
+    parser.add_argument('--config', dest="configfiles", type=str, nargs="+", default = ["test_config.txt"],
+                        help='configuration filenames - default test_config.txt')
+    parser.add_argument('--map', dest="map_names", type=str, nargs="+", default = None,
+                        help='map names to plan - default every map of the configuration files')
+    parser.add_argument('--method', dest="search", type=str, default = "bfs",
+                        choices = ["bfs", "astar"],
+                        help='search method - default bfs')
+    parser.add_argument('--engine', dest="engine", type=str, default = "vectorized",
+                        choices = ["vectorized", "analytic", "clearance", "scalar"],
+                        help='configuration space builder - default vectorized')
+    parser.add_argument('--granularity', dest="granularity", type=int, nargs="+", default = [DEFAULT_GRANULARITY],
+                        help='degree granularities, every scene is planned with each - default '+str(DEFAULT_GRANULARITY))
+    parser.add_argument('--lazy', default = False, action = "store_true",
+                        help='classify maze cells only when the search visits them - default False')
+    parser.add_argument('--levels', dest="levels", type=int, default = 1,
+                        help='plan coarse to fine with bfs at this many granularities, each twice the next, '
+                             'without --lazy, --cache or another engine - default 1')
+    parser.add_argument('--cache', default = False, action = "store_true",
+                        help='read and write the maze cache - default not used')
+    parser.add_argument('--no-paths', dest="paths", default = True, action = "store_false",
+                        help='leave the paths out of the output - default paths written')
+    parser.add_argument('--stats', default = False, action = "store_true",
+                        help='add the time of every stage and the work counters to the output - default False')
+    parser.add_argument('--validate', default = False, action = "store_true",
+                        help='check every pose of the found paths against the map geometry - default False')
+    parser.add_argument('--jobs', dest="jobs", type=int, default = None,
+                        help='number of processes planning scenes - default 1')
+    parser.add_argument('--output', dest="output", type=str, default = None,
+                        help='JSON lines output file - default standard output')
+
+    args = parser.parse_args()
+    scenes = checkArguments(parser, args)
+    tasks = [{"configfile": configfile, "map_name": map_name, "granularity": granularity, "method": args.search,
+              "engine": args.engine, "lazy": args.lazy, "levels": args.levels, "cache": args.cache,
+              "paths": args.paths, "stats": args.stats, "validate": args.validate}
+             for configfile, map_name in scenes
+             for granularity in args.granularity]
+
+    output = open(args.output, "w") if args.output is not None else sys.stdout
+    try:
+        for record in planScenes(tasks, args.jobs):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,247 @@
+# benchmark.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the benchmark of the maze construction and the search.
+Random scenes are generated for every link count and obstacle count, then the
+transform, the Maze construction and the searches are timed over a sweep of
+granularities. The timings are written as JSON lines, and can be compared to a
+saved baseline to catch regressions.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import random
+import sys
+import time
+
+from arm import Arm
+from transform import transformToMaze, buildMaze, getGridSpec, getStartIdx
+from search import search
+from const import *
+
+# Limits and initial angles are multiples of this, so the start is on the lattice of every
+# granularity that divides it
+ANGLE_UNIT = 60
+
+# Stages quicker than this in both runs are left out of the baseline comparison
+MIN_COMPARED_SECONDS = 0.005
+
+
+def generateScene(rng, links, obstacles, radius, window=(600, 600)):
+    """Generate a random scene with one goal reachable by the arm tip.
+
+        Args:
+            rng (random.Random): random generator
+            links (int): number of arm links
+            obstacles (int): number of obstacles
+            radius (tuple): (min, max) radius of the obstacles
+            window (tuple): (width, height) of the window
+
+        Return:
+            dict: ArmBase, ArmLinks, Goals, Obstacles and Window, as in a configuration file
+    """
+    base = (window[0] // 2, window[1] * 3 // 4)
+    budget = min(window) * 0.45
+    armLinks = []
+    for i in range(links):
+        length = int(budget / links * rng.uniform(0.6, 1.0))
+        if i == 0:
+            limit = (0, 180)
+        else:
+            limit = (-ANGLE_UNIT * rng.randint(1, 2), ANGLE_UNIT * rng.randint(1, 2))
+        angle = limit[0] + ANGLE_UNIT * rng.randint(0, (limit[1] - limit[0]) // ANGLE_UNIT)
+        armLinks.append((length, angle, rng.randint(3, 8), limit))
+
+    # The goal sits at the tip of a random configuration, obstacles are kept off it
+    arm = Arm(base, armLinks)
+    arm.setArmAngle([rng.randint(limit[0], limit[1]) for _, _, _, limit in armLinks])
+    tip = arm.getEnd()
+    goal = (tip[0], tip[1], rng.randint(10, 20))
+
+    sceneObstacles = []
+    while len(sceneObstacles) < obstacles:
+        r = rng.randint(radius[0], radius[1])
+        x, y = rng.randint(0, window[0]), rng.randint(0, window[1])
+        if math.hypot(x - goal[0], y - goal[1]) > r + goal[2] + 10 and math.hypot(x - base[0], y - base[1]) > r + 10:
+            sceneObstacles.append((x, y, r))
+
+    return {"ArmBase": base, "ArmLinks": armLinks, "Goals": [goal], "Obstacles": sceneObstacles, "Window": window}
+
+
+def timeCall(function, repeat):
+    """This function calls function repeat times and returns (smallest time in seconds, last result)
+    """
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmarkScene(scene, granularity, engines, methods, repeat):
+    """Time the stages of one scene at one granularity.
+
+        Return:
+            list of (stage, seconds, extra) where extra is a dict of counters of the stage
+    """
+    def build(engine):
+        return transformToMaze(Arm(scene["ArmBase"], scene["ArmLinks"]), scene["Goals"], scene["Obstacles"],
+                               scene["Window"], granularity, engine)
+
+    timings = []
+    maze = None
+    for engine in engines:
+        seconds, maze = timeCall(lambda: build(engine), repeat)
+        timings.append(("transform:" + engine, seconds, {"cells": maze.get_size()}))
+
+    # Same construction as transformToMaze, from the flat cells
+    arm = Arm(scene["ArmBase"], scene["ArmLinks"])
+    offsets, dimensions = getGridSpec(arm, granularity)
+    start = getStartIdx(arm, offsets, granularity, dimensions)
+    cells = bytes(maze.get_cells())
+    seconds, _ = timeCall(lambda: buildMaze(cells, start, offsets, dimensions, granularity), repeat)
+    timings.append(("maze", seconds, {}))
+
+    for method in methods:
+        seconds, (path, statesExplored) = timeCall(lambda: search(maze, method), repeat)
+        timings.append(("search:" + method, seconds,
+                        {"statesExplored": statesExplored, "pathLength": len(path) if path is not None else None}))
+    return timings
+
+
+def warmUp(seed, links, radius, engines, methods):
+    """Run every engine and search method once on a coarse lattice, so the lazy imports of the
+       engines (numpy, cspace, ...) are not timed in the first stage that uses them.
+    """
+    rng = random.Random(seed)
+    for linkCount in links:
+        scene = generateScene(rng, linkCount, 1, radius)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                benchmarkScene(scene, ANGLE_UNIT, engines, methods, 1)
+        except SystemExit:
+            pass
+
+
+def runBenchmark(seed, scenes, links, obstacles, radius, granularities, engines, methods, repeat):
+    """Generate the scenes and time them over the sweep.
+
+        Return:
+            generator of records, one per scene, granularity and stage
+    """
+    warmUp(seed, links, radius, engines, methods)
+    rng = random.Random(seed)
+    for linkCount in links:
+        for obstacleCount in obstacles:
+            for sceneIdx in range(scenes):
+                scene = generateScene(rng, linkCount, obstacleCount, radius)
+                name = "links%d-obstacles%d-%d" % (linkCount, obstacleCount, sceneIdx)
+                for granularity in granularities:
+                    messages = io.StringIO()
+                    try:
+                        with contextlib.redirect_stdout(messages):
+                            timings = benchmarkScene(scene, granularity, engines, methods, repeat)
+                    except SystemExit:
+                        yield {"scene": name, "granularity": granularity, "error": messages.getvalue().strip()}
+                        continue
+                    for stage, seconds, extra in timings:
+                        record = {"scene": name, "granularity": granularity, "stage": stage,
+                                  "seconds": round(seconds, 6)}
+                        record.update(extra)
+                        yield record
+
+
+def getRecordKey(record):
+    return (record["scene"], record["granularity"], record.get("stage"))
+
+
+def compareBaseline(records, baseline, tolerance):
+    """Compare the timings to a baseline.
+
+        Args:
+            records (list): records of this run
+            baseline (list): records of the saved run
+            tolerance (float): a stage is a regression when it is slower than baseline * tolerance
+
+        Return:
+            list: (record, baseline seconds, ratio) of the regressions
+    """
+    saved = {getRecordKey(record): record for record in baseline if "seconds" in record}
+    regressions = []
+    for record in records:
+        old = saved.get(getRecordKey(record))
+        if old is None or "seconds" not in record:
+            continue
+        # Stages too quick to time reliably are not compared
+        if max(old["seconds"], record["seconds"]) < MIN_COMPARED_SECONDS:
+            continue
+        ratio = record["seconds"] / max(old["seconds"], 1e-9)
+        if ratio > tolerance:
+            regressions.append((record, old["seconds"], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='CS440 MP2 Robotic Arm - benchmark')
+
+    parser.add_argument('--seed', dest="seed", type=int, default = 0,
+                        help='seed of the scene generator - default 0')
+    parser.add_argument('--scenes', dest="scenes", type=int, default = 2,
+                        help='scenes per link count and obstacle count - default 2')
+    parser.add_argument('--links', dest="links", type=int, nargs="+", default = [2, 3],
+                        help='link counts - default 2 3')
+    parser.add_argument('--obstacles', dest="obstacles", type=int, nargs="+", default = [5, 20],
+                        help='obstacle counts - default 5 20')
+    parser.add_argument('--radius', dest="radius", type=int, nargs=2, default = [5, 30],
+                        help='min and max obstacle radius - default 5 30')
+    parser.add_argument('--granularity', dest="granularity", type=int, nargs="+", default = [10, 5, 2],
+                        help='degree granularities - default 10 5 2')
+    parser.add_argument('--engines', dest="engines", type=str, nargs="+", default = ["vectorized", "analytic"],
+                        choices = ["vectorized", "analytic", "clearance", "scalar"],
+                        help='configuration space builders to time - default vectorized analytic')
+    parser.add_argument('--methods', dest="methods", type=str, nargs="+", default = ["bfs", "astar"],
+                        choices = ["bfs", "astar"],
+                        help='search methods to time - default bfs astar')
+    parser.add_argument('--repeat', dest="repeat", type=int, default = 3,
+                        help='runs of every stage, the quickest is kept - default 3')
+    parser.add_argument('--output', dest="output", type=str, default = None,
+                        help='JSON lines output file, usable as a baseline - default standard output')
+    parser.add_argument('--baseline', dest="baseline", type=str, default = None,
+                        help='JSON lines of a previous run to compare to - default no comparison')
+    parser.add_argument('--tolerance', dest="tolerance", type=float, default = 1.25,
+                        help='slowdown ratio reported as a regression - default 1.25')
+
+    args = parser.parse_args()
+    output = open(args.output, "w") if args.output is not None else sys.stdout
+    records = []
+    try:
+        for record in runBenchmark(args.seed, args.scenes, args.links, args.obstacles, args.radius,
+                                   args.granularity, args.engines, args.methods, args.repeat):
+            records.append(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+        regressions = compareBaseline(records, baseline, args.tolerance)
+        for record, seconds, ratio in regressions:
+            print("Regression: %s granularity %d %s %.6fs -> %.6fs (x%.2f)"
+                  % (record["scene"], record["granularity"], record["stage"], seconds, record["seconds"], ratio),
+                  file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
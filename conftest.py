@@ -0,0 +1,2 @@
+# test_part4.py is the autograder debug script, it runs a search on import and is not a pytest module
+collect_ignore = ["test_part4.py"]
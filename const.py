@@ -20,6 +20,8 @@ BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 RED = (255,0,0)
 BLUE = (0,0,255)
+# Color key of the layers blitted over the window, never drawn
+TRANSPARENT = (255, 0, 255)
 
 WALL_CHAR = '%'
 START_CHAR = 'P'
@@ -32,3 +34,7 @@ GAMMA = 2
 
 DEFAULT_FPS = 30
 DEFAULT_GRANULARITY = 2
+DEFAULT_LEVELS = 3
+
+DEFAULT_CACHE_DIR = ".mazecache"
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
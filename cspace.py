@@ -0,0 +1,281 @@
+# cspace.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains array based helpers that classify a whole grid of arm
+configurations at once. They reproduce the per-cell tests in geometry.py
+exactly, including the integer truncation in computeCoordinate.
+"""
+
+import numpy as np
+from const import *
+from geometry import computeCoordinate, findDistArray
+import stats
+
+# Upper bound of cells classified at once, it keeps the temporary arrays small for 3D grids
+BLOCK_CELLS = 1 << 18
+
+# Number of consecutive poses of a link sharing one bounding box in the obstacle culling
+CULL_CELLS = 32
+
+
+def getLatticeAngles(limit, granularity):
+    """This function returns every angle visited for a link limit, from min to max by granularity
+    """
+    count = int((limit[1] - limit[0]) / granularity + 1)
+    return np.array([limit[0] + i * granularity for i in range(count)])
+
+
+def computeOffsetGrid(length, angles):
+    """Compute the (dx, dy) offset of a link end for an array of absolute angles.
+
+        Args:
+            length (int): length of the arm link
+            angles (array): absolute angles of the link in degree
+
+        Return:
+            (dx, dy) integer arrays shaped like angles
+    """
+    uniqueAngles, inverse = np.unique(angles, return_inverse=True)
+    table = np.array([computeCoordinate((0, 0), length, angle) for angle in uniqueAngles.tolist()],
+                     dtype=np.int64).reshape(-1, 2)
+    inverse = inverse.reshape(angles.shape)
+    return table[inverse, 0], table[inverse, 1]
+
+
+def computeArmPosGrid(armBase, armLength, angleGrids):
+    """Batched forward kinematics of the arm.
+
+        Args:
+            armBase (tuple): (x, y) of the arm base
+            armLength (list): length of every arm link
+            angleGrids (list): relative angle array of every arm link, broadcastable together
+
+        Return:
+            list: [((startX, startY), (endX, endY))] integer arrays for all arm links
+    """
+    startX = np.int64(armBase[0])
+    startY = np.int64(armBase[1])
+    totalAngle = 0
+    armPos = []
+    for length, angles in zip(armLength, angleGrids):
+        totalAngle = totalAngle + angles
+        dx, dy = computeOffsetGrid(length, totalAngle % 360)
+        endX = startX + dx
+        endY = startY + dy
+        armPos.append(((startX, startY), (endX, endY)))
+        startX, startY = endX, endY
+    return armPos
+
+
+def getObstacleMask(armPos, armDistance, obstacles, shape):
+    """This function returns the boolean grid of configurations where an arm link touches an obstacle.
+       The poses of a link only vary along the axes of the links up to it, they are tested on that
+       smaller grid in chunks of CULL_CELLS consecutive poses. Consecutive poses are close together,
+       and an obstacle is only tested on the chunks whose bounding box it overlaps, so the tests per
+       cell stay nearly flat as obstacles are added away from the arm.
+    """
+    touchObstacle = np.zeros(shape, dtype=bool)
+    if not obstacles:
+        return touchObstacle
+    circles = np.asarray(obstacles).reshape(-1, 3)
+    for (start, end), pad in zip(armPos, armDistance):
+        linkShape = np.broadcast_shapes(np.shape(start[0]), np.shape(start[1]), np.shape(end[0]), np.shape(end[1]))
+        startX, startY, endX, endY = (np.broadcast_to(c, linkShape).reshape(-1)
+                                      for c in (start[0], start[1], end[0], end[1]))
+        poses = len(startX)
+
+        # bounding box of every chunk against the padded obstacles, one comparison per pair
+        firsts = np.arange(0, poses, CULL_CELLS)
+        xmin = np.minimum.reduceat(np.minimum(startX, endX), firsts)[:, None]
+        xmax = np.maximum.reduceat(np.maximum(startX, endX), firsts)[:, None]
+        ymin = np.minimum.reduceat(np.minimum(startY, endY), firsts)[:, None]
+        ymax = np.maximum.reduceat(np.maximum(startY, endY), firsts)[:, None]
+        reach = circles[:, 2] + pad + 1
+        chunks, candidates = np.nonzero((circles[:, 0] + reach >= xmin) & (circles[:, 0] - reach <= xmax) &
+                                        (circles[:, 1] + reach >= ymin) & (circles[:, 1] - reach <= ymax))
+
+        # every (chunk, obstacle) pair tests the poses of the chunk, the last chunk repeats its last pose
+        linkMask = np.zeros(poses, dtype=bool)
+        pairsPerBlock = max(1, BLOCK_CELLS // CULL_CELLS)
+        for first in range(0, len(chunks), pairsPerBlock):
+            pairChunks = chunks[first:first + pairsPerBlock]
+            circle = circles[candidates[first:first + pairsPerBlock]]
+            idx = np.minimum(firsts[pairChunks, None] + np.arange(CULL_CELLS), poses - 1)
+            dist = findDistArray((startX[idx], startY[idx]), (endX[idx], endY[idx]), (circle[:, 0:1], circle[:, 1:2]))
+            linkMask[idx[dist - circle[:, 2:3] - pad <= 0]] = True
+            stats.count(stats.COLLISION_TESTS, idx.size)
+        touchObstacle |= linkMask.reshape(linkShape)
+    return touchObstacle
+
+
+def getGoalMask(armPos, goals, shape):
+    """This function returns the boolean grid of configurations where the arm tip touches a goal
+    """
+    tipX, tipY = armPos[-1][1]
+    touchGoal = np.zeros(shape, dtype=bool)
+    for goal in goals:
+        touchGoal |= np.sqrt((tipX - goal[0]) ** 2 + (tipY - goal[1]) ** 2) <= goal[2]
+    return touchGoal
+
+
+def getWindowMask(armPos, window, shape):
+    """This function returns the boolean grid of configurations where a link leaves the window
+    """
+    withinWindow = np.ones(shape, dtype=bool)
+    for link in armPos:
+        for x, y in link:
+            withinWindow &= (x >= 0) & (x <= window[0]) & (y >= 0) & (y <= window[1])
+    return ~withinWindow
+
+
+def classifyGrid(armPos, armDistance, goals, obstacles, window, shape):
+    """Classify every configuration of a grid into maze characters.
+
+        Args:
+            armPos (list): output of computeArmPosGrid
+            armDistance (list): padding distance of every arm link
+            goals (list): [(x, y, r)] of goals
+            obstacles (list): [(x, y, r)] of obstacles
+            window (tuple): (width, height) of the window
+            shape (tuple): shape of the grid
+
+        Return:
+            uint8 array of maze characters, using the precedence wall, objective, out of window
+    """
+    grid = np.full(shape, ord(SPACE_CHAR), dtype=np.uint8)
+    grid[getWindowMask(armPos, window, shape)] = ord(WALL_CHAR)
+    grid[getGoalMask(armPos, goals, shape)] = ord(OBJECTIVE_CHAR)
+    grid[getObstacleMask(armPos, armDistance, obstacles, shape)] = ord(WALL_CHAR)
+    return grid
+
+
+def iterateBlocks(arm, granularity, rows=None):
+    """This function runs the forward kinematics over the grid of the arm, in blocks of alpha rows
+       of at most BLOCK_CELLS cells. rows is an optional [start, end) range of alpha indices.
+
+        Return:
+            generator of (first row, arm positions of computeArmPosGrid, block shape)
+    """
+    angles = [getLatticeAngles(limit, granularity) for limit in arm.getArmLimit()]
+    if rows is not None:
+        angles[ALPHA] = angles[ALPHA][rows[0]:rows[1]]
+    shape = tuple(len(a) for a in angles)
+
+    rowCells = int(np.prod(shape[1:]))
+    blockRows = max(1, BLOCK_CELLS // max(1, rowCells))
+    for rowStart in range(0, shape[ALPHA], blockRows):
+        blockAngles = [angles[ALPHA][rowStart:rowStart + blockRows]] + angles[1:]
+        blockShape = tuple(len(a) for a in blockAngles)
+        angleGrids = [a.reshape([-1 if i == axis else 1 for i in range(len(blockShape))])
+                      for axis, a in enumerate(blockAngles)]
+        yield rowStart, computeArmPosGrid(arm.getBase(), arm.getArmLength(), angleGrids), blockShape
+
+
+def buildGrid(arm, goals, obstacles, window, granularity, rows=None):
+    """Build the maze character grid of every configuration of the arm, without the start cell.
+       The grid has one axis per arm link. rows is an optional [start, end) range of alpha indices to build.
+    """
+    blocks = []
+    for _, armPos, blockShape in iterateBlocks(arm, granularity, rows):
+        blocks.append(classifyGrid(armPos, arm.getArmDistance(), goals, obstacles, window, blockShape))
+    return np.concatenate(blocks)
+
+
+def classifyAngles(arm, goals, obstacles, window, angles):
+    """Classify a list of configurations into maze characters.
+
+        Args:
+            angles (array): K x (number of links) array of relative angles
+
+        Return:
+            uint8 array of K maze characters, without the start cell
+    """
+    angles = np.asarray(angles).reshape(len(angles), -1)
+    armPos = computeArmPosGrid(arm.getBase(), arm.getArmLength(), [angles[:, i] for i in range(angles.shape[1])])
+    return classifyGrid(armPos, arm.getArmDistance(), goals, obstacles, window, (len(angles),))
+
+
+class ArmGrid:
+    # The angle lattice of an arm at a granularity. The poses of all the links but the last one only
+    # depend on the leading angles, so they are kept on that smaller (prefix) grid. This lets the
+    # cells blocked by one obstacle be found without running the forward kinematics on the full grid.
+    def __init__(self, arm, granularity):
+        self.arm = arm
+        self.granularity = granularity
+        self.angles = [getLatticeAngles(limit, granularity) for limit in arm.getArmLimit()]
+        self.shape = tuple(len(a) for a in self.angles)
+        self.size = int(np.prod(self.shape))
+
+        self.__prefixShape = self.shape[:-1]
+        angleGrids = [a.reshape([-1 if i == axis else 1 for i in range(len(self.__prefixShape))])
+                      for axis, a in enumerate(self.angles[:-1])]
+        self.__prefixPos = computeArmPosGrid(arm.getBase(), arm.getArmLength()[:-1], angleGrids)
+        self.__prefixAngle = np.broadcast_to(sum(angleGrids, np.int64(0)), self.__prefixShape).reshape(-1)
+        if self.__prefixPos:
+            lastStart = self.__prefixPos[-1][1]
+        else:
+            lastStart = (np.int64(arm.getBase()[0]), np.int64(arm.getBase()[1]))
+        self.__lastStart = [np.broadcast_to(c, self.__prefixShape).reshape(-1) for c in lastStart]
+
+    def getLayer(self, maskFunction, *args):
+        """This function evaluates maskFunction(armPos, *args, blockShape) over the whole grid
+           and returns the flat boolean mask
+        """
+        mask = np.empty(self.shape, dtype=bool)
+        for rowStart, armPos, blockShape in iterateBlocks(self.arm, self.granularity):
+            mask[rowStart:rowStart + blockShape[ALPHA]] = maskFunction(armPos, *args, blockShape)
+        return mask.reshape(-1)
+
+    def getWindowLayer(self, window):
+        """This function returns the flat mask of the cells where the arm leaves the window
+        """
+        return self.getLayer(getWindowMask, window)
+
+    def getGoalLayer(self, goal):
+        """This function returns the flat mask of the cells where the arm tip touches the goal
+        """
+        return self.getLayer(getGoalMask, [goal])
+
+    def classifyBase(self, goals, window):
+        """This function classifies every cell as if there were no obstacles (goal and window tests only)
+           and returns the flat uint8 array of maze characters, without the start cell.
+        """
+        return buildGrid(self.arm, goals, [], window, self.granularity).reshape(-1)
+
+    def getFootprint(self, obstacle):
+        """This function returns the sorted flat indices of the cells where the arm touches the obstacle.
+           Links before the last one are tested on the prefix grid. The last link is only tested for
+           prefix cells whose last joint is within reach of the obstacle.
+        """
+        lastAxis = self.shape[-1]
+        lengths = self.arm.getArmLength()
+        distances = self.arm.getArmDistance()
+
+        prefixHit = np.zeros(self.__prefixShape, dtype=bool)
+        for (start, end), pad in zip(self.__prefixPos, distances):
+            prefixHit |= findDistArray(start, end, obstacle) - obstacle[2] - pad <= 0
+        prefixHit = prefixHit.reshape(-1)
+        stats.count(stats.COLLISION_TESTS, prefixHit.size * len(self.__prefixPos))
+
+        # The last link end is at most its length away from its start, after truncation as well
+        startX, startY = self.__lastStart
+        reach = lengths[-1] + obstacle[2] + distances[-1] + 1
+        near = (startX - obstacle[0]) ** 2 + (startY - obstacle[1]) ** 2 <= reach ** 2
+        candidates = np.flatnonzero(near & ~prefixHit)
+
+        totalAngle = self.__prefixAngle[candidates][:, None] + self.angles[-1][None, :]
+        dx, dy = computeOffsetGrid(lengths[-1], totalAngle % 360)
+        start = (startX[candidates][:, None], startY[candidates][:, None])
+        end = (start[0] + dx, start[1] + dy)
+        lastHit = findDistArray(start, end, obstacle) - obstacle[2] - distances[-1] <= 0
+        stats.count(stats.COLLISION_TESTS, lastHit.size)
+
+        lastCells = np.arange(lastAxis)
+        blocked = [(np.flatnonzero(prefixHit)[:, None] * lastAxis + lastCells).reshape(-1),
+                   (candidates[:, None] * lastAxis + lastCells)[lastHit]]
+        return np.sort(np.concatenate(blocked))
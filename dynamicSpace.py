@@ -0,0 +1,88 @@
+# dynamicSpace.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the DynamicSpace class, a configuration space that is updated
+in place when obstacles are added, moved or removed.
+"""
+
+import numpy as np
+from const import *
+from cspace import ArmGrid
+from maze import Maze
+from transform import getGridSpec, getStartIdx
+
+class DynamicSpace:
+    # Builds the obstacle free classification once, then keeps for every obstacle the cells it blocks
+    # and how many obstacles block every cell. Changing one obstacle only touches its own cells.
+    def __init__(self, arm, goals, window, granularity, obstacles=()):
+        self.__grid = ArmGrid(arm, granularity)
+        self.__offsets, dimensions = getGridSpec(arm, granularity)
+        self.granularity = granularity
+
+        self.__base = self.__grid.classifyBase(goals, window)
+        self.__cells = self.__base.copy()
+        self.__count = np.zeros(self.__grid.size, dtype=np.uint16)
+
+        start = getStartIdx(arm, self.__offsets, granularity, dimensions)
+        self.__start = None if start is None else int(np.ravel_multi_index(start, dimensions))
+        self.__markStart()
+
+        self.__obstacles = {}
+        self.__footprints = {}
+        self.__nextId = 0
+        for obstacle in obstacles:
+            self.addObstacle(obstacle)
+
+    def __markStart(self):
+        if self.__start is not None:
+            self.__cells[self.__start] = ord(START_CHAR)
+
+    def addObstacle(self, obstacle):
+        """This function adds an obstacle (x, y, r) and returns its id
+        """
+        obstacleId = self.__nextId
+        self.__nextId += 1
+        self.__place(obstacleId, obstacle)
+        return obstacleId
+
+    def removeObstacle(self, obstacleId):
+        """This function removes the obstacle with the given id
+        """
+        footprint = self.__footprints.pop(obstacleId)
+        del self.__obstacles[obstacleId]
+        self.__count[footprint] -= 1
+        self.__cells[footprint] = np.where(self.__count[footprint] > 0, ord(WALL_CHAR), self.__base[footprint])
+        self.__markStart()
+
+    def moveObstacle(self, obstacleId, obstacle):
+        """This function replaces the obstacle with the given id by obstacle (x, y, r), keeping its id
+        """
+        self.removeObstacle(obstacleId)
+        self.__place(obstacleId, obstacle)
+
+    def __place(self, obstacleId, obstacle):
+        footprint = self.__grid.getFootprint(obstacle)
+        self.__obstacles[obstacleId] = obstacle
+        self.__footprints[obstacleId] = footprint
+        self.__count[footprint] += 1
+        self.__cells[footprint] = ord(WALL_CHAR)
+        self.__markStart()
+
+    # Returns the obstacles as a list of (x, y, r), in the order of their ids
+    def getObstacles(self):
+        return [self.__obstacles[obstacleId] for obstacleId in sorted(self.__obstacles)]
+
+    # Returns the number of cells blocked by the obstacle with the given id
+    def getFootprintSize(self, obstacleId):
+        return len(self.__footprints[obstacleId])
+
+    def getMaze(self):
+        """This function returns a Maze of the current obstacles, the same as transformToMaze would build.
+           The maze gets its own copy of the cells, so later updates do not change it.
+        """
+        return Maze(self.__cells.reshape(self.__grid.shape).copy(), self.__offsets, self.granularity)
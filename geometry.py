@@ -12,7 +12,6 @@ This file contains geometry functions that relate with Paralpha in MP2.
 """
 
 import math
-import numpy as np
 from const import *
 
 
@@ -35,6 +34,61 @@ def computeCoordinate(start, length, angle):
     return (endX, endY)
 
 
+# Offset tables of the link lengths already seen, length -> [(dx, dy) for every whole degree]
+OFFSET_TABLES = {}
+
+# Move tables of getMoveTable, (length, granularity, steps) -> [[distance for every step] for every whole degree]
+MOVE_TABLES = {}
+
+
+def getOffsetTable(length):
+    """Compute computeCoordinate((0, 0), length, angle) for the whole degrees 0 to 359, once per length.
+       Every angle lattice of an integer granularity only has whole degrees, so a link end is one lookup.
+
+        Return:
+            list of 360 (dx, dy) integer offsets, indexed by angle % 360
+    """
+    table = OFFSET_TABLES.get(length)
+    if table is None:
+        table = [computeCoordinate((0, 0), length, angle) for angle in range(360)]
+        OFFSET_TABLES[length] = table
+    return table
+
+
+def getMoveTable(length, granularity, steps):
+    """Compute how far the truncated end offset of a link moves when its absolute angle turns by at most
+       s * granularity degrees, for every whole degree and s from 0 to steps. It bounds the move of the
+       link end computed with getOffsetTable, the integer truncation included.
+
+        Return:
+            list of 360 lists of steps + 1 distances, indexed by angle % 360 then s
+    """
+    key = (length, granularity, steps)
+    table = MOVE_TABLES.get(key)
+    if table is None:
+        offsets = getOffsetTable(length)
+        table = []
+        for angle in range(360):
+            x, y = offsets[angle]
+            moves = [0.0]
+            for s in range(1, steps + 1):
+                turned = [offsets[(angle + turn) % 360] for turn in (s * granularity, -s * granularity)]
+                moves.append(max([moves[-1]] + [math.sqrt((tx - x) ** 2 + (ty - y) ** 2) for tx, ty in turned]))
+            table.append(moves)
+        MOVE_TABLES[key] = table
+    return table
+
+
+def lookupCoordinate(start, length, angle, offsets):
+    """Compute computeCoordinate(start, length, angle) with the offset table of the length,
+       whole degrees from 0 to 359 are looked up and the other angles are computed.
+    """
+    if 0 <= angle < 360 and angle == int(angle):
+        offsetX, offsetY = offsets[int(angle)]
+        return (start[0] + offsetX, start[1] + offsetY)
+    return computeCoordinate(start, length, angle)
+
+
 '''
 def doesArmTouchObjects(armPosDist, objects, isGoal=False):
     """Determine whether the given arm links touch any obstacle or goal
@@ -93,7 +147,7 @@ def intersect(obj_pos, start, end):
 
     dx = obj_pos[0] - a
     dy = obj_pos[1] - b
-    dist = np.sqrt(dx * dx + dy * dy)  # dythagorean
+    dist = math.sqrt(dx * dx + dy * dy)  # dythagorean
 
     return dist
 
@@ -172,6 +226,7 @@ def doesArmTouchObjects(armPosDist, objects, isGoal=False):
     return False
 
 
+
 def findDist(armPosDist, c):
     # Algorithm inspiration:
     # https://stackoverflow.com/questions/849211/shortest-distance-between-a-point-and-a-line-segment
@@ -201,6 +256,92 @@ def findDist(armPosDist, c):
     return math.sqrt(xFin ** 2 + yFin ** 2)
 
 
+def findDistArray(start, end, c):
+    """Array version of findDist. Every coordinate may be a number or an array, they are broadcast together.
+
+        Args:
+            start (tuple): (x, y) of the segment starts
+            end (tuple): (x, y) of the segment ends
+            c (tuple): (x, y) of the points
+
+        Return:
+            array of distances from the points to the segments, clamped to the segment ends like findDist.
+            A segment of zero length measures the distance to its start.
+    """
+    import numpy as np
+    x0, y0 = c[0], c[1]
+    x1, y1 = start[0], start[1]
+    x2, y2 = end[0], end[1]
+
+    dx = x2 - x1
+    dy = y2 - y1
+
+    euclid = dx ** 2 + dy ** 2
+    dot = (x0 - x1) * dx + (y0 - y1) * dy
+
+    u = np.divide(dot, euclid, out=np.zeros(np.broadcast(dot, euclid).shape), where=euclid != 0)
+    u = np.clip(u, 0, 1)
+
+    xFin = (x1 + u * dx) - x0
+    yFin = (y1 + u * dy) - y0
+
+    return np.sqrt(xFin ** 2 + yFin ** 2)
+
+
+def findDistMatrix(armPosDist, objects):
+    """Distance from every object center to every arm link in one call.
+
+        Args:
+            armPosDist (list): start and end position (and padding distance) of N arm links [(start, end, distance)]
+            objects (list): x-, y- coordinate and radius of M objects [(x, y, r)]
+
+        Return:
+            N x M array of the findDist distances
+    """
+    import numpy as np
+    links = np.array([(link[0][0], link[0][1], link[1][0], link[1][1]) for link in armPosDist]).reshape(-1, 4)
+    centers = np.array([(obj[0], obj[1]) for obj in objects]).reshape(-1, 2)
+    return findDistArray((links[:, 0:1], links[:, 1:2]), (links[:, 2:3], links[:, 3:4]),
+                         (centers[:, 0], centers[:, 1]))
+
+
+def touchObjectsMatrix(armPosDist, objects, isGoal=False):
+    """Matrix version of doesArmTouchObjects.
+
+        Args:
+            armPosDist (list): start and end position and padding distance of N arm links [(start, end, distance)]
+            objects (list): x-, y- coordinate and radius of M objects (obstacles or goals) [(x, y, r)]
+            isGoal (bool): True if the object is a goal, then the padding distance is ignored
+
+        Return:
+            N x M boolean array, True where the link touches the object
+    """
+    import numpy as np
+    radius = np.array([obj[2] for obj in objects]).reshape(1, -1)
+    pad = np.zeros((len(armPosDist), 1))
+    if not isGoal:
+        pad = np.array([link[2] for link in armPosDist]).reshape(-1, 1)
+    return findDistMatrix(armPosDist, objects) - radius - pad <= 0
+
+
+def tipTouchGoalsMatrix(armEnds, goals):
+    """Matrix version of doesArmTipTouchGoals.
+
+        Args:
+            armEnds (list): N arm tip positions [(x, y)]
+            goals (list): x-, y- coordinate and radius of M goals [(x, y, r)]
+
+        Return:
+            N x M boolean array, True where the tip touches the goal
+    """
+    import numpy as np
+    ends = np.array(armEnds).reshape(-1, 2)
+    targets = np.array(goals).reshape(-1, 3)
+    dx = ends[:, 0:1] - targets[:, 0]
+    dy = ends[:, 1:2] - targets[:, 1]
+    return np.sqrt(dx ** 2 + dy ** 2) <= targets[:, 2]
+
+
 def doesArmTipTouchGoals(armEnd, goals):
     """Determine whether the given arm tick touch goals
 
@@ -211,7 +352,7 @@ def doesArmTipTouchGoals(armEnd, goals):
             True if arm tip touches any goal. False if not.
     """
     for goal in goals:
-        dist = np.sqrt(((armEnd[0] - goal[0]) ** 2) + ((armEnd[1] - goal[1]) ** 2))
+        dist = math.sqrt(((armEnd[0] - goal[0]) ** 2) + ((armEnd[1] - goal[1]) ** 2))
         if dist <= goal[2]:
             # print("GOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOALGOAL")
             return True
@@ -279,8 +420,18 @@ if __name__ == '__main__':
     testGoal = [(100, 100, 10)]
     resultDoesArmTouchGoals = [True, True, False]
 
-    testResults = [doesArmTickTouchGoals(testArmEnd, testGoal) for testArmEnd in testArmEnds]
+    testResults = [doesArmTipTouchGoals(testArmEnd, testGoal) for testArmEnd in testArmEnds]
     assert resultDoesArmTouchGoals == testResults
+    assert tipTouchGoalsMatrix(testArmEnds, testGoal)[:, 0].tolist() == resultDoesArmTouchGoals
+
+    allObstacles = [obstacle[0] for obstacle in testObstacles]
+    resultMatrix = touchObjectsMatrix(testArmPosDists, allObstacles)
+    assert resultMatrix.ravel().tolist() == resultDoesArmTouchObjects[:8]
+    resultMatrix = touchObjectsMatrix(testArmPosDists, allObstacles, isGoal=True)
+    assert resultMatrix.ravel().tolist() == resultDoesArmTouchObjects[8:]
+    for i, testArmPosDist in enumerate(testArmPosDists):
+        for j, obstacle in enumerate(allObstacles):
+            assert findDistMatrix(testArmPosDists, allObstacles)[i, j] == findDist(testArmPosDist, obstacle)
 
     testArmPoss = [((100, 100), (135, 110)), ((135, 110), (150, 150))]
     testWindows = [(160, 130), (130, 170), (200, 200)]
@@ -0,0 +1,87 @@
+# layers.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the LayerCache class. It keeps reusable configuration space
+layers and assembles mazes out of them:
+    - a window layer per (arm, window, granularity), the cells where the arm leaves the window
+    - a goal layer per (arm, goal, granularity), the cells where the arm tip touches the goal
+    - an obstacle layer per (arm, obstacle, granularity), the cells blocked by the obstacle,
+      kept as sorted flat indices since obstacles usually block a small part of the grid
+Scenes that share an arm and a window only compute the layers of what they do not share.
+"""
+
+import numpy as np
+from const import *
+from cspace import ArmGrid
+from maze import Maze
+from transform import getGridSpec, getStartIdx
+
+
+def getArmKey(arm):
+    """This function returns a hashable description of the arm geometry, without its current angles
+    """
+    return (tuple(arm.getBase()), tuple(arm.getArmLength()), tuple(arm.getArmDistance()),
+            tuple(tuple(limit) for limit in arm.getArmLimit()))
+
+
+class LayerCache:
+    def __init__(self):
+        self.__grids = {}
+        self.__windows = {}
+        self.__goals = {}
+        self.__obstacles = {}
+
+    def getArmGrid(self, arm, granularity):
+        key = (getArmKey(arm), granularity)
+        if key not in self.__grids:
+            self.__grids[key] = ArmGrid(arm, granularity)
+        return self.__grids[key]
+
+    def getWindowLayer(self, arm, window, granularity):
+        key = (getArmKey(arm), granularity, tuple(window))
+        if key not in self.__windows:
+            self.__windows[key] = self.getArmGrid(arm, granularity).getWindowLayer(window)
+        return self.__windows[key]
+
+    def getGoalLayer(self, arm, goal, granularity):
+        key = (getArmKey(arm), granularity, tuple(goal))
+        if key not in self.__goals:
+            self.__goals[key] = self.getArmGrid(arm, granularity).getGoalLayer(goal)
+        return self.__goals[key]
+
+    def getObstacleLayer(self, arm, obstacle, granularity):
+        key = (getArmKey(arm), granularity, tuple(obstacle))
+        if key not in self.__obstacles:
+            self.__obstacles[key] = self.getArmGrid(arm, granularity).getFootprint(obstacle)
+        return self.__obstacles[key]
+
+    def clear(self):
+        self.__grids.clear()
+        self.__windows.clear()
+        self.__goals.clear()
+        self.__obstacles.clear()
+
+    def transformToMaze(self, arm, goals, obstacles, window, granularity):
+        """This function assembles the same maze as transform.transformToMaze out of cached layers,
+           with the same precedence: start, then obstacle wall, then objective, then window wall.
+        """
+        armGrid = self.getArmGrid(arm, granularity)
+        offsets, dimensions = getGridSpec(arm, granularity)
+
+        cells = np.full(armGrid.size, ord(SPACE_CHAR), dtype=np.uint8)
+        cells[self.getWindowLayer(arm, window, granularity)] = ord(WALL_CHAR)
+        for goal in goals:
+            cells[self.getGoalLayer(arm, goal, granularity)] = ord(OBJECTIVE_CHAR)
+        for obstacle in obstacles:
+            cells[self.getObstacleLayer(arm, obstacle, granularity)] = ord(WALL_CHAR)
+
+        cells = cells.reshape(armGrid.shape)
+        start = getStartIdx(arm, offsets, granularity, dimensions)
+        if start is not None:
+            cells[start] = ord(START_CHAR)
+        return Maze(cells, offsets, granularity)
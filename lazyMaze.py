@@ -0,0 +1,198 @@
+# lazyMaze.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the LazyMaze class, a maze whose cells are classified the first
+time the search looks at them instead of all at once by transformToMaze. Only the
+objectives are found up front, from the cells where the arm tip touches a goal.
+"""
+
+import copy
+from const import *
+from transform import getGridSpec, getStartIdx, classifyConfig, classifyRows, buildMaze
+from spatialIndex import SceneIndex, cullScene, CULL_SLACK
+import stats
+
+UNKNOWN = 0
+
+class LazyMaze:
+    # Initializes the maze from the map configuration. The start cell and the objectives are known up front,
+    # every other cell is classified with the arm and geometry tests on first visit and memoized.
+    def __init__(self, arm, goals, obstacles, window, granularity):
+        self.__arm = arm.clone()
+        self.__goals = goals
+        self.__obstacles = obstacles
+        self.__window = window
+        self.__index = SceneIndex(arm, goals, obstacles)
+
+        self.offsets, self.__dimensions = getGridSpec(arm, granularity)
+        self.granularity = granularity
+
+        self.__strides = [1] * len(self.__dimensions)
+        for i in range(len(self.__dimensions) - 2, -1, -1):
+            self.__strides[i] = self.__strides[i+1] * self.__dimensions[i+1]
+        self.__axes = list(zip(self.__strides, self.__dimensions))
+
+        size = 1
+        for dim in self.__dimensions:
+            size *= dim
+        self.__cells = bytearray(size)
+        self.__objective = []
+        self.__wall = ord(WALL_CHAR)
+        self.__goal = ord(OBJECTIVE_CHAR)
+
+        self.__startIdx = getStartIdx(arm, self.offsets, granularity, self.__dimensions)
+        if self.__startIdx is None:
+            print("Maze has no start")
+            raise SystemExit
+        start = 0
+        for k, stride in zip(self.__startIdx, self.__strides):
+            start += k * stride
+        self.__cells[start] = ord(START_CHAR)
+        self.__start = self.idx_to_angle(start)
+
+        self.__findObjectives()
+        if not self.__objective:
+            print("Maze has no objectives")
+            raise SystemExit
+
+    # Classifies the cells where the arm tip touches a goal, the only cells that can be objectives.
+    # Only the alpha rows where the links after the first can bring the tip to a goal are swept, and the
+    # goal cells of every block are classified at once with the array tests of cspace.
+    def __findObjectives(self):
+        import numpy as np
+        import cspace
+        obstacles = cullScene(self.__arm, self.__obstacles)
+        armDistance = self.__arm.getArmDistance()
+        for rows in self.__getGoalRows():
+            for rowStart, armPos, blockShape in cspace.iterateBlocks(self.__arm, self.granularity, rows):
+                hits = np.flatnonzero(cspace.getGoalMask(armPos, self.__goals, blockShape))
+                if not len(hits):
+                    continue
+                hitPos = [tuple(tuple(np.broadcast_to(c, blockShape).reshape(-1)[hits] for c in point) for point in link)
+                          for link in armPos]
+                chars = cspace.classifyGrid(hitPos, armDistance, self.__goals, obstacles, self.__window, (len(hits),))
+                first = (rows[0] + rowStart) * self.__strides[ALPHA]
+                for idx, code in zip((hits + first).tolist(), chars.tolist()):
+                    if self.__cells[idx] == UNKNOWN:
+                        self.__cells[idx] = code
+                        stats.count(stats.CELLS_CLASSIFIED)
+                    if self.__cells[idx] == self.__goal:
+                        self.__objective.append(self.idx_to_angle(idx))
+
+    # Returns the [start, end) runs of alpha rows where the tip can touch a goal. The truncated offsets
+    # of the other links are never longer than the links, so the tip stays within their total length
+    # of the end of the first link.
+    def __getGoalRows(self):
+        import numpy as np
+        import cspace
+        limit = self.__arm.getArmLimit()[ALPHA]
+        lengths = self.__arm.getArmLength()
+        base = self.__arm.getBase()
+        dx, dy = cspace.computeOffsetGrid(lengths[0], cspace.getLatticeAngles(limit, self.granularity) % 360)
+        reach = sum(lengths[1:]) + CULL_SLACK
+        near = np.zeros(len(dx), dtype=bool)
+        for goal in self.__goals:
+            near |= np.sqrt((base[0] + dx - goal[0]) ** 2 + (base[1] + dy - goal[1]) ** 2) <= goal[2] + reach
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], near.astype(np.int8), [0]])))
+        return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+    # Returns the character code of the flat index, classifying it if it was never visited
+    def get_cell(self, idx):
+        code = self.__cells[idx]
+        if code == UNKNOWN:
+            angles = self.idx_to_angle(idx)
+            char = classifyConfig(self.__arm, self.__goals, self.__obstacles, self.__window, angles, self.__index)
+            code = ord(char)
+            self.__cells[idx] = code
+            stats.count(stats.CELLS_CLASSIFIED)
+            if char == OBJECTIVE_CHAR:
+                self.__objective.append(angles)
+        return code
+
+    # Returns the number of cells classified so far
+    def get_classified_count(self):
+        return len(self.__cells) - self.__cells.count(UNKNOWN)
+
+    def angle_to_idx(self, angles):
+        idx = 0
+        for i in range(len(self.__axes)):
+            k = int((angles[i] - self.offsets[i]) / self.granularity)
+            if k < 0 or k >= self.__axes[i][1]:
+                return -1
+            idx += k * self.__axes[i][0]
+        return idx
+
+    def idx_to_angle(self, idx):
+        angles = []
+        for i in range(len(self.__axes)):
+            stride, dim = self.__axes[i]
+            angles.append(int((idx // stride % dim) * self.granularity + self.offsets[i]))
+        return tuple(angles)
+
+    def is_free_idx(self, idx):
+        return self.get_cell(idx) != self.__wall
+
+    def is_objective_idx(self, idx):
+        return self.get_cell(idx) == self.__goal
+
+    def neighbors_idx(self, idx):
+        neighbors = []
+        for stride, dim in self.__axes:
+            k = idx // stride % dim
+            if k + 1 < dim and self.get_cell(idx + stride) != self.__wall:
+                neighbors.append(idx + stride)
+            if k > 0 and self.get_cell(idx - stride) != self.__wall:
+                neighbors.append(idx - stride)
+        return neighbors
+
+    # Returns a bytearray over the flat indices, 1 at the objectives of getObjectives
+    def get_goal_mask(self):
+        goal = bytearray(len(self.__cells))
+        for objective in self.__objective:
+            goal[self.angle_to_idx(objective)] = 1
+        return goal
+
+    def get_size(self):
+        return len(self.__cells)
+
+    def getChar(self, *angles):
+        return chr(self.get_cell(self.angle_to_idx(angles)))
+
+    def isWall(self, *angles):
+        return self.getChar(*angles) == WALL_CHAR
+
+    def isObjective(self, *angles):
+        return self.getChar(*angles) == OBJECTIVE_CHAR
+
+    def isValidMove(self, *angles):
+        idx = self.angle_to_idx(angles)
+        return idx >= 0 and self.get_cell(idx) != self.__wall
+
+    def getNeighbors(self, *angles):
+        idx = self.angle_to_idx(angles)
+        if idx < 0:
+            return []
+        return [self.idx_to_angle(n) for n in self.neighbors_idx(idx)]
+
+    def getStart(self):
+        return self.__start
+
+    def setStart(self, start):
+        self.__start = start
+
+    def getDimensions(self):
+        return self.__dimensions
+
+    def getObjectives(self):
+        return copy.deepcopy(self.__objective)
+
+    # Classifies all the cells at once and returns the same Maze as transformToMaze
+    def toMaze(self):
+        cells = classifyRows(self.__arm, self.__goals, self.__obstacles, self.__window, self.granularity,
+                             "vectorized", 0, self.__dimensions[ALPHA])
+        return buildMaze(cells, self.__startIdx, self.offsets, self.__dimensions, self.granularity)
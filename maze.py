@@ -17,22 +17,55 @@ from const import *
 from util import *
 
 class Maze:
-    # Initializes the Maze object by reading the maze from a file
-    def __init__(self, input_map, offsets, granularity):        
+    # Initializes the Maze object from the grid of characters built by transformToMaze.
+    # input_map is either nested lists of characters, or an array of character codes (uint8)
+    # with one axis per arm link, so a three link arm gives a 3D maze. With dimensions given,
+    # input_map is the flat bytes of character codes in row major order, and numpy is not needed.
+    # A memoryview, like the memory map of mazeFile.loadMazeFile, is used without copy.
+    # The cells are kept in one flat buffer in row major (alpha major) order.
+    # With start and objectives given, the cells are not scanned for them.
+    def __init__(self, input_map, offsets, granularity, dimensions=None, start=None, objectives=None):        
         self.__start = None
         self.__objective = []        
 
         self.offsets = offsets
         self.granularity = granularity
     
-        self.__dimensions = [len(input_map), len(input_map[0])]        
-        self.__map = input_map
-        for x in range(self.__dimensions[ALPHA]):
-            for y in range(self.__dimensions[BETA]):                
-                if self.__map[x][y] == START_CHAR:                    
-                    self.__start = idxToAngle((x, y), self.offsets, granularity)
-                elif self.__map[x][y] == OBJECTIVE_CHAR:
-                    self.__objective.append(idxToAngle((x, y), self.offsets, granularity))
+        if dimensions is not None:
+            self.__grid = None
+            self.__dimensions = list(dimensions)
+            self.__cells = input_map if isinstance(input_map, (bytearray, memoryview)) else bytearray(input_map)
+        elif hasattr(input_map, 'shape'):
+            import numpy as np
+            self.__grid = np.ascontiguousarray(input_map, dtype=np.uint8)
+            self.__dimensions = list(self.__grid.shape)
+            self.__cells = memoryview(self.__grid).cast('B')
+        else:
+            self.__grid = None
+            self.__dimensions = []
+            rows = input_map
+            while isinstance(rows, (list, tuple)):
+                self.__dimensions.append(len(rows))
+                rows = rows[0]
+            self.__cells = bytearray("".join(flattenMap(input_map)).encode())
+
+        # stride of every axis in the flat buffer, the last angle changes fastest
+        self.__strides = [1] * len(self.__dimensions)
+        for i in range(len(self.__dimensions) - 2, -1, -1):
+            self.__strides[i] = self.__strides[i+1] * self.__dimensions[i+1]
+        self.__axes = list(zip(self.__strides, self.__dimensions))
+        self.__wall = ord(WALL_CHAR)
+        self.__goal = ord(OBJECTIVE_CHAR)
+
+        if start is not None and objectives is not None:
+            self.__start = tuple(start)
+            self.__objective = [tuple(objective) for objective in objectives]
+        else:
+            starts = self.__findCells(START_CHAR)
+            if starts:
+                self.__start = self.idx_to_angle(starts[-1])
+            for idx in self.__findCells(OBJECTIVE_CHAR):
+                self.__objective.append(self.idx_to_angle(idx))
 
         if not self.__start:
             print("Maze has no start")            
@@ -42,26 +75,93 @@ class Maze:
             print("Maze has no objectives")
             raise SystemExit
 
-    def getChar(self, alpha, beta):
-        x, y = angleToIdx((alpha, beta), self.offsets, self.granularity)
-        return self.__map[x][y]
+    def __findCells(self, char):
+        if self.__grid is not None:
+            import numpy as np
+            return np.flatnonzero(self.__grid.reshape(-1) == ord(char)).tolist()
+        cells = self.__cells if hasattr(self.__cells, 'find') else bytes(self.__cells)
+        found = []
+        idx = cells.find(ord(char))
+        while idx >= 0:
+            found.append(idx)
+            idx = cells.find(ord(char), idx + 1)
+        return found
+
+    # Returns the flat index of the given angles, or -1 if they are outside of the maze
+    def angle_to_idx(self, angles):
+        idx = 0
+        for i in range(len(self.__axes)):
+            k = int((angles[i] - self.offsets[i]) / self.granularity)
+            if k < 0 or k >= self.__axes[i][1]:
+                return -1
+            idx += k * self.__axes[i][0]
+        return idx
+
+    # Returns the angles of the given flat index
+    def idx_to_angle(self, idx):
+        angles = []
+        for i in range(len(self.__axes)):
+            stride, dim = self.__axes[i]
+            angles.append(int((idx // stride % dim) * self.granularity + self.offsets[i]))
+        return tuple(angles)
+
+    # Returns True if the flat index is not a wall
+    def is_free_idx(self, idx):
+        return self.__cells[idx] != self.__wall
+
+    # Returns True if the flat index is an objective
+    def is_objective_idx(self, idx):
+        return self.__cells[idx] == self.__goal
+
+    # Returns the flat indices of the free neighbors, in the same order as getNeighbors
+    def neighbors_idx(self, idx):
+        cells = self.__cells
+        wall = self.__wall
+        neighbors = []
+        for stride, dim in self.__axes:
+            k = idx // stride % dim
+            if k + 1 < dim and cells[idx + stride] != wall:
+                neighbors.append(idx + stride)
+            if k > 0 and cells[idx - stride] != wall:
+                neighbors.append(idx - stride)
+        return neighbors
+
+    # Returns a bytearray over the flat indices, 1 at the objectives of getObjectives
+    def get_goal_mask(self):
+        goal = bytearray(len(self.__cells))
+        for objective in self.__objective:
+            idx = self.angle_to_idx(objective)
+            if idx >= 0:
+                goal[idx] = 1
+        return goal
+
+    # Returns the flat buffer of character codes, in row major order
+    def get_cells(self):
+        return self.__cells
+
+    # Returns the number of cells of the maze
+    def get_size(self):
+        return len(self.__cells)
+
+    def getChar(self, *angles):
+        return chr(self.__cells[self.angle_to_idx(angles)])
 
     # Returns True if the given position is the location of a wall
-    def isWall(self, alpha, beta):
-        return self.getChar(alpha, beta) == WALL_CHAR
+    def isWall(self, *angles):
+        return self.getChar(*angles) == WALL_CHAR
 
     # Rturns True if the given position is the location of an objective
-    def isObjective(self, alpha, beta):
-        return self.getChar(alpha, beta) == OBJECTIVE_CHAR
+    def isObjective(self, *angles):
+        return self.getChar(*angles) == OBJECTIVE_CHAR
 
-    # Returns the start position as a tuple of (beta, column)
+    # Returns the start position as a tuple of (alpha, beta) or (alpha, beta, gamma)
     def getStart(self):
         return self.__start
 
     def setStart(self, start):
         self.__start = start
 
-    # Returns the dimensions of the maze as a (beta, column) tuple
+    # Returns the dimensions of the maze, the number of cells along every angle
     def getDimensions(self):
         return self.__dimensions
 
@@ -72,36 +172,35 @@ class Maze:
     def setObjectives(self, objectives):
         self.__objective = objectives
 
-    # Check if the agent can move into a specific beta and column
-    def isValidMove(self, alpha, beta):
-        x, y = angleToIdx((alpha, beta), self.offsets, self.granularity)
-        return x >= 0 and x < self.getDimensions()[ALPHA] and \
-               y >= 0 and y < self.getDimensions()[BETA] and \
-               not self.isWall(alpha, beta)
+    # Check if the agent can move into a specific position
+    def isValidMove(self, *angles):
+        idx = self.angle_to_idx(angles)
+        return idx >= 0 and self.__cells[idx] != self.__wall
         
-    # Returns list of neighboing squares that can be moved to from the given beta,gamma
-    def getNeighbors(self, alpha, beta):
-        possibleNeighbors = [
-            (alpha + self.granularity, beta),
-            (alpha - self.granularity, beta),
-            (alpha, beta + self.granularity),
-            (alpha, beta - self.granularity)            
-        ]
+    # Returns list of neighboing positions that can be moved to from the given position,
+    # changing one angle by the granularity (4 neighbors in 2D, 6 in 3D)
+    def getNeighbors(self, *angles):
+        idx = self.angle_to_idx(angles)
+        if idx < 0:
+            return []
         neighbors = []
-        for a, b in possibleNeighbors:
-            if self.isValidMove(a,b):
-                neighbors.append((a,b))
+        for n in self.neighbors_idx(idx):
+            neighbors.append(self.idx_to_angle(n))
         return neighbors
 
+    # Writes the maze with a beta row per line and an alpha column per character.
+    # A 3D maze is written as one such block per gamma, separated by an empty line.
     def saveToFile(self, filename):        
-        outputMap = ""
-        for beta in range(self.__dimensions[1]):
-            for alpha in range(self.__dimensions[0]):
-                outputMap += self.__map[alpha][beta]
-            outputMap += "\n"
-
+        dimensions = self.__dimensions + [1] * (3 - len(self.__dimensions))
+        strides = self.__strides + [0] * (3 - len(self.__strides))
         with open(filename, 'w') as f:
-            f.write(outputMap)
+            for gamma in range(dimensions[GAMMA]):
+                if gamma > 0:
+                    f.write("\n")
+                for beta in range(dimensions[BETA]):
+                    first = beta * strides[BETA] + gamma * strides[GAMMA]
+                    row = self.__cells[first:first + dimensions[ALPHA] * strides[ALPHA]:strides[ALPHA]]
+                    f.write(bytes(row).decode() + "\n")
 
         return True
             
@@ -111,13 +210,13 @@ class Maze:
         for i in range(1, len(path)):
             prev = path[i-1]
             cur = path[i]
-            dist = abs(prev[0]-cur[0]) + abs(prev[1]-cur[1])
+            dist = sum(abs(p - c) for p, c in zip(prev, cur))
             if dist != self.granularity:
                 return "Not single hop"
 
         # Second, check whether it is valid move
         for pos in path:
-            if not self.isValidMove(pos[0], pos[1]):
+            if not self.isValidMove(*pos):
                 return "Not valid move"
 
 
@@ -128,4 +227,29 @@ class Maze:
         return "Valid"
 
     def get_map(self):
-        return self.__map
+        return unflattenMap(bytes(self.__cells).decode(), self.__dimensions)
+
+    # Returns the grid of character codes (uint8 array) with one axis per angle
+    def getGrid(self):
+        if self.__grid is None:
+            import numpy as np
+            self.__grid = np.frombuffer(self.__cells, dtype=np.uint8).reshape(self.__dimensions)
+        return self.__grid
+
+
+def flattenMap(input_map):
+    """This function yields the characters of nested lists in row major order
+    """
+    for row in input_map:
+        if isinstance(row, (list, tuple)):
+            yield from flattenMap(row)
+        else:
+            yield row
+
+def unflattenMap(cells, dimensions):
+    """This function splits a row major string of characters into nested lists
+    """
+    if len(dimensions) == 1:
+        return list(cells)
+    size = len(cells) // dimensions[0]
+    return [unflattenMap(cells[i*size:(i+1)*size], dimensions[1:]) for i in range(dimensions[0])]
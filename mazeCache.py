@@ -0,0 +1,187 @@
+# mazeCache.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a persistent cache of transformed mazes. Entries are keyed by a
+hash of the map configuration and stored as .npy grids that are memory-mapped on load.
+The least recently used entries are evicted once the cache grows over its size cap.
+The goal wavefront of a maze is cached next to it under the same key.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from const import *
+from maze import Maze
+from transform import transformToMaze, getGridSpec
+import stats
+
+# Part of the cache key, bumped whenever the layout of the cached grids changes.
+# 2: three link arms are cached as 3D grids, one axis per arm link
+CACHE_VERSION = 2
+
+
+def getCacheKey(arm, goals, obstacles, window, granularity):
+    """This function returns the content hash of a map configuration.
+       The arm contributes its base and (length, angle, distance, limit) of every link.
+    """
+    armLinks = list(zip(arm.getArmLength(), arm.getArmAngle(), arm.getArmDistance(), arm.getArmLimit()))
+    spec = {
+        "version": CACHE_VERSION,
+        "window": window,
+        "armBase": arm.getBase(),
+        "armLinks": armLinks,
+        "obstacles": obstacles,
+        "goals": goals,
+        "granularity": granularity,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def getCachePath(cacheDir, key):
+    return os.path.join(cacheDir, key + ".npy")
+
+
+def getWavefrontPath(cacheDir, key):
+    return os.path.join(cacheDir, key + ".wavefront.npy")
+
+
+def loadMaze(arm, granularity, path):
+    """This function loads a cached grid with a memory map and wraps it into a Maze.
+       None is returned if there is no entry.
+    """
+    import numpy as np
+    try:
+        grid = np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    # Touch the entry so that eviction sees it as recently used. An entry evicted by another
+    # process in the meantime is a miss.
+    if not touchEntry(path):
+        return None
+    offsets, _ = getGridSpec(arm, granularity)
+    return Maze(grid, offsets, granularity)
+
+
+def touchEntry(path):
+    """This function marks a cache entry as recently used, False if it was removed in the meantime
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def saveMaze(maze, path, maxSize=DEFAULT_CACHE_SIZE):
+    """This function stores the grid of the maze and evicts old entries over maxSize bytes.
+       The file is written next to its final name and renamed, so readers never see partial entries.
+    """
+    saveArray(maze.getGrid(), path, maxSize)
+
+
+def saveArray(grid, path, maxSize=DEFAULT_CACHE_SIZE):
+    """This function stores an array as a cache entry and evicts old entries over maxSize bytes.
+       The file is written next to its final name and renamed, so readers never see partial entries.
+    """
+    import numpy as np
+    cacheDir = os.path.dirname(path) or "."
+    os.makedirs(cacheDir, exist_ok=True)
+
+    fd, tempPath = tempfile.mkstemp(dir=cacheDir, suffix=".tmp")
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, grid)
+    os.replace(tempPath, path)
+
+    evict(cacheDir, maxSize)
+
+
+def evict(cacheDir, maxSize):
+    """This function removes the least recently used entries until the cache fits in maxSize bytes.
+       Other processes may evict the same directory, entries that are already gone are skipped.
+    """
+    entries = []
+    for name in os.listdir(cacheDir):
+        if name.endswith(".npy"):
+            try:
+                stat = os.stat(os.path.join(cacheDir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+    entries.sort()
+
+    total = sum(entry[1] for entry in entries)
+    for _, size, name in entries[:-1]:
+        if total <= maxSize:
+            break
+        try:
+            os.remove(os.path.join(cacheDir, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def transformToMazeCached(arm, goals, obstacles, window, granularity, cacheDir=DEFAULT_CACHE_DIR,
+                          rebuild=False, maxSize=DEFAULT_CACHE_SIZE, **kwargs):
+    """This function returns the maze of transformToMaze, reusing the cached grid when present.
+
+        Args:
+            cacheDir (str): directory of the cache entries
+            rebuild (bool): True to ignore the cached entry and overwrite it
+            maxSize (int): size cap of the cache directory in bytes
+            kwargs: extra arguments of transformToMaze (engine, workers)
+    """
+    path = getCachePath(cacheDir, getCacheKey(arm, goals, obstacles, window, granularity))
+    if not rebuild:
+        with stats.stage("cacheLoad"):
+            maze = loadMaze(arm, granularity, path)
+        if maze is not None:
+            return maze
+
+    maze = transformToMaze(arm, goals, obstacles, window, granularity, **kwargs)
+    saveMaze(maze, path, maxSize)
+    return maze
+
+
+def loadWavefront(maze, path):
+    """This function loads a cached wavefront with a memory map, None is returned if there is no entry
+       or if it does not fit the maze.
+    """
+    import numpy as np
+    from wavefront import Wavefront
+    try:
+        field = np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if field.shape != (2, maze.get_size()) or field.dtype != np.int32:
+        return None
+    if not touchEntry(path):
+        return None
+    return Wavefront(maze, memoryview(field[0]), memoryview(field[1]))
+
+
+def getWavefrontCached(maze, arm, goals, obstacles, window, granularity, cacheDir=DEFAULT_CACHE_DIR,
+                       rebuild=False, maxSize=DEFAULT_CACHE_SIZE):
+    """This function returns the wavefront.Wavefront of the maze of the map configuration, reusing the
+       cached field when present. The maze has to be the one of transformToMaze for the same arguments.
+    """
+    import numpy as np
+    from wavefront import Wavefront
+    path = getWavefrontPath(cacheDir, getCacheKey(arm, goals, obstacles, window, granularity))
+    if not rebuild:
+        with stats.stage("cacheLoad"):
+            wavefront = loadWavefront(maze, path)
+        if wavefront is not None:
+            return wavefront
+
+    wavefront = Wavefront(maze)
+    field = np.stack([np.frombuffer(wavefront.getDistances(), dtype=np.int32),
+                      np.frombuffer(wavefront.getNextHops(), dtype=np.int32)])
+    saveArray(field, path, maxSize)
+    return wavefront
@@ -0,0 +1,164 @@
+# mazeFile.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the readers and writers of maze files. The binary format is a
+JSON header (dimensions, offsets, granularity, start and objectives) followed by the
+cells, raw or run-length encoded. Raw cells are memory-mapped on load, so a large
+maze is not copied. The text format is the one of Maze.saveToFile and SampleOutputs.
+"""
+
+import json
+import mmap
+import struct
+
+from const import *
+from maze import Maze
+
+MAGIC = b"MP2MAZE\n"
+FILE_VERSION = 1
+BINARY_EXTENSION = ".maze"
+
+# Magic, then the length of the header in bytes. The header is padded with spaces
+# so that the cells start on a multiple of ALIGNMENT.
+HEADER_LENGTH = struct.Struct("<I")
+ALIGNMENT = 8
+
+
+def encodeRuns(cells):
+    """Run-length encode the character codes.
+
+        Args:
+            cells (buffer): flat character codes
+
+        Return:
+            (codes, lengths): uint8 array of the code of every run and uint32 array of its length
+    """
+    import numpy as np
+    cells = np.frombuffer(cells, dtype=np.uint8)
+    if len(cells) == 0:
+        return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.uint32)
+    starts = np.concatenate(([0], np.flatnonzero(cells[1:] != cells[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(cells)))
+    return cells[starts], lengths.astype(np.uint32)
+
+
+def saveMazeFile(maze, filename, encoding="raw"):
+    """Write the maze in the binary format.
+
+        Args:
+            maze (Maze): maze to write
+            filename (str): path of the file
+            encoding (str): "raw" for cells that are memory-mapped on load, "rle" for run-length encoded cells
+    """
+    cells = maze.get_cells()
+    header = {
+        "version": FILE_VERSION,
+        "encoding": encoding,
+        "dimensions": list(maze.getDimensions()),
+        "offsets": list(maze.offsets),
+        "granularity": maze.granularity,
+        "start": maze.getStart(),
+        "objectives": maze.getObjectives(),
+        "size": len(cells),
+    }
+    if encoding == "rle":
+        codes, lengths = encodeRuns(cells)
+        header["runs"] = len(codes)
+    elif encoding != "raw":
+        print("Unknown maze file encoding " + encoding)
+        raise SystemExit
+
+    text = json.dumps(header).encode()
+    used = len(MAGIC) + HEADER_LENGTH.size + len(text)
+    text += b" " * (-used % ALIGNMENT)
+    with open(filename, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(text)))
+        f.write(text)
+        if encoding == "rle":
+            f.write(codes.tobytes())
+            f.write(lengths.astype('<u4').tobytes())
+        else:
+            f.write(cells)
+    return True
+
+
+def loadMazeFile(filename):
+    """Read a maze written by saveMazeFile. Raw cells stay in a read-only memory map of the file,
+       run-length encoded cells are decoded into memory.
+
+        Return:
+            Maze
+    """
+    try:
+        with open(filename, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        print("Cannot read " + filename)
+        raise SystemExit
+
+    first = len(MAGIC) + HEADER_LENGTH.size
+    if data[:len(MAGIC)] != MAGIC or len(data) < first:
+        print(filename + " is not a maze file")
+        raise SystemExit
+    length, = HEADER_LENGTH.unpack(data[len(MAGIC):first])
+    header = json.loads(data[first:first + length])
+    if header["version"] != FILE_VERSION:
+        print("Unsupported maze file version %d in %s" % (header["version"], filename))
+        raise SystemExit
+
+    first += length
+    size = header["size"]
+    if header["encoding"] == "rle":
+        import numpy as np
+        runs = header["runs"]
+        codes = np.frombuffer(data, dtype=np.uint8, count=runs, offset=first)
+        lengths = np.frombuffer(data, dtype='<u4', count=runs, offset=first + runs)
+        cells = memoryview(np.repeat(codes, lengths))
+    else:
+        cells = memoryview(data)[first:first + size]
+    if len(cells) != size:
+        print(filename + " is truncated")
+        raise SystemExit
+
+    return Maze(cells, header["offsets"], header["granularity"], header["dimensions"],
+                start=header["start"], objectives=header["objectives"])
+
+
+def loadTextMaze(filename, offsets, granularity):
+    """Read a maze written by Maze.saveToFile, like the files of SampleOutputs. Every line is a beta row
+       with one character per alpha, and a 3D maze has one such block per gamma separated by an empty line.
+       The offsets and the granularity are not in the text file, the maze has one axis per offset.
+
+        Return:
+            Maze
+    """
+    try:
+        with open(filename) as f:
+            text = f.read()
+    except OSError:
+        print("Cannot read " + filename)
+        raise SystemExit
+
+    blocks = [block.split("\n") for block in text.rstrip("\n").split("\n\n")]
+    # (alpha, beta, gamma) sizes of the file, the axes after the ones of the offsets hold a single cell
+    shape = [len(blocks[0][0]), len(blocks[0]), len(blocks)]
+    if any(len(block) != shape[BETA] or any(len(row) != shape[ALPHA] for row in block) for block in blocks):
+        print(filename + " has rows of different lengths")
+        raise SystemExit
+    if len(offsets) > len(shape) or any(dim != 1 for dim in shape[len(offsets):]):
+        print("%s does not have %d axes" % (filename, len(offsets)))
+        raise SystemExit
+
+    # the file is beta rows of alpha columns, the cells are alpha major
+    if len(blocks) == 1:
+        cells = "".join(map("".join, zip(*blocks[0])))
+    else:
+        cells = "".join(blocks[gamma][beta][alpha] for alpha in range(shape[ALPHA])
+                        for beta in range(shape[BETA]) for gamma in range(shape[GAMMA]))
+    return Maze(cells.encode(), offsets, granularity, shape[:len(offsets)])
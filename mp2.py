@@ -11,59 +11,84 @@
 This file contains the main application that is run for this MP.
 """
 
-import pygame
 import sys
 import argparse
-import configparser
-import copy
 
-from pygame.locals import *
 from arm import Arm
 from transform import transformToMaze
+from mazeCache import transformToMazeCached
+from mazeFile import saveMazeFile, BINARY_EXTENSION
 from search import search
+from sceneConfig import getScene
+from poseTable import PoseTable, BLOCKED, GOAL
+import stats
 from const import *
 from util import *
-from geometry import *
+
+# pygame is only imported once a window is opened, see loadPygame
+pygame = None
+
+def loadPygame():
+    global pygame
+    import pygame
 
 class Application:
 
     def __init__(self, configfile, map_name, human=True, fps=DEFAULT_FPS):
         self.running = False
         self.displaySurface = None
-        self.config = configparser.ConfigParser()
-        self.config.read(configfile)
         self.fps = fps
         self.__human = human
-        self.clock = pygame.time.Clock()   
+        self.clock = None
         self.trajectory = []   
+        self.trajectoryLayer = None
+        self.staticLayer = None
 
         # Parse config file
         self.windowTitle = "CS440 MP2 Robotic Arm"
-        self.window = eval(self.config.get(map_name, 'Window'))
+        with stats.stage("parse"):
+            scene = getScene(configfile, map_name)
+            self.window = scene['Window']
 
-        armBase = eval(self.config.get(map_name, 'ArmBase'))
-        armLinks = eval(self.config.get(map_name, 'ArmLinks'))
-        self.armLimits = [(0, 0), (0, 0), (0, 0)]
-        for i in range(len(armLinks)):
-            self.armLimits[i] = armLinks[i][-1]
-        self.arm = Arm(armBase, armLinks)
+            armBase = scene['ArmBase']
+            armLinks = scene['ArmLinks']
+            self.armLimits = [(0, 0), (0, 0), (0, 0)]
+            for i in range(len(armLinks)):
+                self.armLimits[i] = armLinks[i][-1]
+            self.arm = Arm(armBase, armLinks)
 
-        self.obstacles = eval(self.config.get(map_name, 'Obstacles'))
-        self.goals = eval(self.config.get(map_name, 'Goals'))
+            self.obstacles = scene['Obstacles']
+            self.goals = scene['Goals']
 
 
     # Initializes the pygame context and certain properties of the maze
     def initialize(self):
-        
+        loadPygame()
         pygame.init()
+        self.clock = pygame.time.Clock()
         self.displaySurface = pygame.display.set_mode((self.window[0], self.window[1]), pygame.HWSURFACE)
         self.displaySurface.fill(WHITE)
         pygame.display.flip()
         pygame.display.set_caption(self.windowTitle)
+
+        # Obstacles and goals never move, they are drawn once to the layer blitted over every frame
+        self.staticLayer = self.createLayer()
+        self.drawObstacles(self.staticLayer)
+        self.drawGoal(self.staticLayer)
+        self.trajectoryLayer = self.createLayer()
         self.running = True
 
     # Once the application is initiated, execute is in charge of drawing the game and dealing with the game loop
-    def execute(self, searchMethod, granularity, trajectory, saveImage, saveMaze):        
+    def execute(self, searchMethod, granularity, trajectory, saveImage, saveMaze, engine="vectorized", workers=None,
+                cache=True, rebuildCache=False, lazy=False, levels=1, maxFrames=None, precompute=False):        
+        if not self.__human and levels > 1:
+            from multiResolution import checkOptions
+            # the maze options only build the saved maze, the levels are planned without one
+            checkOptions({"--method " + searchMethod: searchMethod != "bfs", "--lazy": lazy,
+                          "--engine " + engine: engine != "vectorized" and not saveMaze,
+                          "--workers": workers is not None and not saveMaze,
+                          "--rebuild-cache": rebuildCache and not saveMaze})
+
         self.initialize()
         if not self.running:
             print("Program init failed")
@@ -74,72 +99,74 @@ class Application:
             currAngle[i] = self.arm.getArmAngle()[i]
         self.gameLoop()        
 
-        if not self.__human:
+        if not self.__human and levels > 1:
+            from multiResolution import planCoarseToFine
+            print("Planning from coarse to fine...")
+            path = planCoarseToFine(self.arm, self.goals, self.obstacles, self.window, granularity, levels)
+            if saveMaze:
+                # The full maze is only built to be saved, it is not part of the planning stats
+                with stats.suspended():
+                    maze = self.buildMaze(granularity, engine, workers, cache, rebuildCache)
+            self.playPath(path, trajectory, maxFrames)
+
+        elif not self.__human:
             print("Transforming a map configuration to a maze...")
-            maze = transformToMaze(self.arm, self.goals, self.obstacles, self.window, granularity)
+            if lazy:
+                from lazyMaze import LazyMaze
+                # Cells are classified while searching, only the objectives are found up front
+                maze = LazyMaze(self.arm, self.goals, self.obstacles, self.window, granularity)
+            else:
+                maze = self.buildMaze(granularity, engine, workers, cache, rebuildCache)
             print("Done!")
             print("Searching the path...")
-            path = search(maze, searchMethod)
-            if path is None:
-                print("No path found!")
-            else:
-                for i in range(len(path)):
-                    self.arm.setArmAngle(path[i])
-                    if (trajectory > 0) and (i % trajectory == 0):
-                        self.trajectory.append(self.arm.getArmPos())
-                    self.gameLoop()
-                print("Done!")
-                self.drawTrajectory()
+            path, statesExplored = search(maze, searchMethod)
+            print("States explored:", statesExplored)
+            self.playPath(path, trajectory, maxFrames)
+
+        else:
+            # The validity of the poses reachable with the keys, classified when first reached
+            poses = PoseTable(self.arm, self.goals, self.obstacles, self.window, granularity)
+            if precompute:
+                poses.fill()
 
         while self.running:
             pygame.event.pump()            
             keys = pygame.key.get_pressed()
                         
-            if (keys[K_ESCAPE]):
+            if (keys[pygame.K_ESCAPE]):
                 self.running = False                
 
             if self.__human:                
                 alpha, beta, gamma = currAngle                
-                if (keys[K_z]):                    
+                if (keys[pygame.K_z]):                    
                     alpha += granularity if isValueInBetween(self.armLimits[ALPHA], alpha+granularity) else 0
 
-                if (keys[K_x]):                    
+                if (keys[pygame.K_x]):                    
                     alpha -= granularity if isValueInBetween(self.armLimits[ALPHA], alpha-granularity) else 0
 
-                if (keys[K_a]):                    
+                if (keys[pygame.K_a]):                    
                     beta += granularity if isValueInBetween(self.armLimits[BETA], beta+granularity) else 0
 
-                if (keys[K_s]):                    
+                if (keys[pygame.K_s]):                    
                     beta -= granularity if isValueInBetween(self.armLimits[BETA], beta-granularity) else 0
 
-                if (keys[K_q]):                    
+                if (keys[pygame.K_q]):                    
                     gamma += granularity if isValueInBetween(self.armLimits[GAMMA], gamma+granularity) else 0
 
-                if (keys[K_w]):                    
+                if (keys[pygame.K_w]):                    
                     gamma -= granularity if isValueInBetween(self.armLimits[GAMMA], gamma-granularity) else 0
 
                 newAngle = (alpha, beta, gamma)                
-                tempArm = copy.deepcopy(self.arm)
-                tempArm.setArmAngle(newAngle)
-                armEnd = tempArm.getEnd()
-                armPos = tempArm.getArmPos()
-                armPosDist = tempArm.getArmPosDist()
-
-                print("doesArmTouchObjects", doesArmTouchObjects(armPosDist, self.obstacles))
-
-                # print(armPosDist)
-                
-                if doesArmTouchObjects(armPosDist, self.obstacles) or not isArmWithinWindow(armPos, self.window):
-                    continue
+                pose = poses.lookup(newAngle)
 
-                if not doesArmTipTouchGoals(armEnd, self.goals) and doesArmTouchObjects(armPosDist, self.goals, isGoal=True):
+                if pose == BLOCKED:
                     continue
                 
                 self.arm.setArmAngle(newAngle)
                 self.gameLoop()
-                currAngle = copy.deepcopy(newAngle)
+                currAngle = newAngle
 
-                if doesArmTipTouchGoals(armEnd, self.goals):
+                if pose == GOAL:
                     self.gameLoop()
                     print("SUCCESS")
                     raise SystemExit
@@ -149,27 +176,71 @@ class Application:
             pygame.image.save(self.displaySurface, saveImage)
 
         if saveMaze and not self.__human:
-            maze.saveToFile(saveMaze)
+            if lazy:
+                maze = maze.toMaze()
+            if saveMaze.endswith(BINARY_EXTENSION):
+                saveMazeFile(maze, saveMaze)
+            else:
+                maze.saveToFile(saveMaze)
             
 
+    # Builds the full maze with the engine and the cache options
+    def buildMaze(self, granularity, engine, workers, cache, rebuildCache):
+        if cache:
+            return transformToMazeCached(self.arm, self.goals, self.obstacles, self.window, granularity,
+                                         rebuild=rebuildCache, engine=engine, workers=workers)
+        return transformToMaze(self.arm, self.goals, self.obstacles, self.window, granularity, engine, workers)
+
+    # Moves the arm along the path, leaving a footprint every trajectory moves.
+    # With maxFrames, only every few poses are drawn so that the playback shows at most maxFrames frames,
+    # the footprints of the poses in between are still left.
+    def playPath(self, path, trajectory, maxFrames=None):
+        if path is None:
+            print("No path found!")
+        else:
+            footprints = (len(path) - 1) // trajectory + 1 if trajectory > 0 else 0
+            frameStep = 1 if not maxFrames else max(1, -(-len(path) // maxFrames))
+            with stats.stage("playback"):
+                for i in range(len(path)):
+                    self.arm.setArmAngle(path[i])
+                    if (trajectory > 0) and (i % trajectory == 0):
+                        self.addTrajectory(self.arm.getArmPos(), footprints)
+                    if i % frameStep == 0 or i == len(path) - 1:
+                        self.gameLoop()
+            print("Done!")
+            self.drawTrajectory()
+        if stats.isEnabled():
+            print(stats.getStats().report())
+
     def gameLoop(self):
         self.clock.tick(self.fps)
         self.displaySurface.fill(WHITE)
         self.drawTrajectory()
         self.drawArm()
-        self.drawObstacles()
-        self.drawGoal()
+        self.displaySurface.blit(self.staticLayer, (0, 0))
         pygame.display.flip()
-      
+
+
+    # Returns a window sized surface, its TRANSPARENT pixels are left out when it is blitted
+    def createLayer(self):
+        layer = pygame.Surface((self.window[0], self.window[1]))
+        layer.fill(TRANSPARENT)
+        layer.set_colorkey(TRANSPARENT)
+        return layer
+
+
+    # Draws a footprint once onto the trajectory layer. The shade goes from light to black
+    # over the footprints of the path, footprints is their total count.
+    def addTrajectory(self, armPos, footprints):
+        self.trajectory.append(armPos)
+        x = (255 - 255/footprints*len(self.trajectory))
+        color = (x, x, x)
+        for i in range(len(armPos)):
+            pygame.draw.line(self.trajectoryLayer, color, armPos[i][0], armPos[i][1], ARM_LINKS_WIDTH[i])
+
 
     def drawTrajectory(self):
-        cnt = 1
-        for armPos in self.trajectory:
-            x = (255 - 255/len(self.trajectory)*cnt)
-            color = (x, x, x)
-            cnt += 1
-            for i in range(len(armPos)):
-                pygame.draw.line(self.displaySurface, color, armPos[i][0], armPos[i][1], ARM_LINKS_WIDTH[i])  
+        self.displaySurface.blit(self.trajectoryLayer, (0, 0))
 
 
     def drawArm(self):
@@ -178,14 +249,14 @@ class Application:
             pygame.draw.line(self.displaySurface, BLACK, armPos[i][0], armPos[i][1], ARM_LINKS_WIDTH[i])  
 
 
-    def drawObstacles(self):
+    def drawObstacles(self, surface):
         for obstacle in self.obstacles:
-            pygame.draw.circle(self.displaySurface, RED, (obstacle[0], obstacle[1]), obstacle[2])
+            pygame.draw.circle(surface, RED, (obstacle[0], obstacle[1]), obstacle[2])
 
 
-    def drawGoal(self):
+    def drawGoal(self, surface):
         for goal in self.goals:
-            pygame.draw.circle(self.displaySurface, BLUE, (goal[0], goal[1]), goal[2])
+            pygame.draw.circle(surface, BLUE, (goal[0], goal[1]), goal[2])
 
 
 
@@ -198,12 +269,32 @@ if __name__ == "__main__":
     parser.add_argument('--map', dest="map_name", type=str, default = "BasicMap",
                         help='configuration filename - default BasicMap')
     parser.add_argument('--method', dest="search", type=str, default = "bfs", 
-                        choices = ["bfs"],
+                        choices = ["bfs", "astar"],
                         help='search method - default bfs')
+    parser.add_argument('--engine', dest="engine", type=str, default = "vectorized",
+                        choices = ["vectorized", "analytic", "clearance", "scalar"],
+                        help='configuration space builder - default vectorized')
+    parser.add_argument('--workers', dest="workers", type=int, default = None,
+                        help='number of processes building the maze - default 1')
+    parser.add_argument('--no-cache', dest="cache", default = True, action = "store_false",
+                        help='do not read or write the maze cache - default cache used')
+    parser.add_argument('--rebuild-cache', dest="rebuildCache", default = False, action = "store_true",
+                        help='rebuild the maze and overwrite its cache entry - default False')
+    parser.add_argument('--lazy', default = False, action = "store_true",
+                        help='classify maze cells only when the search visits them - default False')
+    parser.add_argument('--levels', dest="levels", type=int, default = 1,
+                        help='plan coarse to fine with bfs at this many granularities, each twice the next. '
+                             'The maze options only apply to --save-maze - default 1')
+    parser.add_argument('--stats', default = False, action = "store_true",
+                        help='print the time of every stage and the work counters - default False')
     parser.add_argument('--human', default = False, action = "store_true",
                         help='flag for human playable - default False')
+    parser.add_argument('--precompute', default = False, action = "store_true",
+                        help='classify every pose of the human mode before playing instead of on first reach - default False')
     parser.add_argument('--fps', dest="fps", type=int, default = DEFAULT_FPS,
                         help='fps for the display - default '+str(DEFAULT_FPS))
+    parser.add_argument('--max-frames', dest="maxFrames", type=int, default = None,
+                        help='draw at most this many frames of the path, skipping poses in between - default every pose')
     parser.add_argument('--granularity', dest="granularity", type=int, default = DEFAULT_GRANULARITY,
                         help='degree granularity - default '+str(DEFAULT_GRANULARITY))
     parser.add_argument('--trajectory', dest="trajectory", type=int, default = 0, 
@@ -211,8 +302,11 @@ if __name__ == "__main__":
     parser.add_argument('--save-image', dest="saveImage", type=str, default = None, 
                         help='save output to image file - default not saved')
     parser.add_argument('--save-maze', dest="saveMaze", type=str, default = None, 
-                        help='save the contructed maze to maze file - default not saved')
+                        help='save the contructed maze to maze file, binary if it ends with .maze - default not saved')
     
     args = parser.parse_args()
+    if args.stats:
+        stats.enable()
     app = Application(args.configfile, args.map_name, args.human, args.fps)
-    app.execute(args.search, args.granularity, args.trajectory, args.saveImage, args.saveMaze)
\ No newline at end of file
+    app.execute(args.search, args.granularity, args.trajectory, args.saveImage, args.saveMaze, args.engine, args.workers,
+                args.cache, args.rebuildCache, args.lazy, args.levels, args.maxFrames, args.precompute)
\ No newline at end of file
@@ -0,0 +1,186 @@
+# multiResolution.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a coarse to fine planner. The maze is searched at a coarse
+granularity first, then only a corridor around the coarse path is classified and
+searched at every finer granularity, down to the requested one.
+
+Level k uses every 2**k-th cell of the fine grid, so every coarse cell is also a
+fine cell and its classification is shared between levels.
+"""
+
+from collections import deque
+
+import numpy as np
+from const import *
+import cspace
+import stats
+from transform import getGridSpec, getStartIdx
+
+
+def getOptionsError(options):
+    """This function returns the message of the options that coarse to fine planning cannot honor, None if
+       there are none. Every level is searched with bfs over cells classified with the array tests when the
+       corridor reaches them, so no full maze is built, searched or cached.
+
+        Args:
+            options (dict): {command line flag: True if it is set}
+    """
+    unsupported = [flag for flag, isSet in options.items() if isSet]
+    if unsupported:
+        return ("--levels searches every level with bfs over cells classified as needed, "
+                "it cannot be used with " + ", ".join(unsupported))
+    return None
+
+
+def checkOptions(options):
+    """This function stops with the message of getOptionsError if an option is set that coarse to fine
+       planning cannot honor.
+    """
+    message = getOptionsError(options)
+    if message is not None:
+        print(message)
+        raise SystemExit
+
+
+def planCoarseToFine(arm, goals, obstacles, window, granularity, levels=DEFAULT_LEVELS, radius=1):
+    """This function plans a path from the initial arm angle to a goal with coarse to fine refinement.
+
+        Args:
+            arm (Arm): arm instance
+            goals (list): [(x, y, r)] of goals
+            obstacles (list): [(x, y, r)] of obstacles
+            window (tuple): (width, height) of the window
+            granularity (int): the fine granularity, the path is given at this granularity
+            levels (int): number of resolutions, the coarsest uses granularity * 2**(levels-1)
+            radius (int): half width of the corridor around the coarser path, in cells of the finer level.
+                          It is doubled until a path is found or the corridor covers the whole level.
+
+        Return:
+            list: path of angles that passes Maze.isValidPath at the fine granularity, None if no path.
+                  The path is not guaranteed to be the shortest one.
+    """
+    offsets, dimensions = getGridSpec(arm, granularity)
+    start = getStartIdx(arm, offsets, granularity, dimensions)
+    if start is None:
+        print("Maze has no start")
+        raise SystemExit
+
+    planner = CoarseToFinePlanner(arm, goals, obstacles, window, granularity, offsets, dimensions, start)
+    path = None
+    with stats.stage("coarseToFine"):
+        for level in range(levels - 1, -1, -1):
+            path = planner.refine(2 ** level, path, radius)
+
+    if path is None:
+        return None
+    return [planner.toAngles(idx) for idx in path]
+
+
+class CoarseToFinePlanner:
+    # Keeps the classification of the fine grid cells that were looked at, in a bytearray (0 if unknown)
+    def __init__(self, arm, goals, obstacles, window, granularity, offsets, dimensions, start):
+        self.__arm = arm
+        self.__goals = goals
+        self.__obstacles = obstacles
+        self.__window = window
+        self.__granularity = granularity
+        self.__offsets = np.array(offsets)
+        self.__dimensions = np.array(dimensions)
+        self.__strides = [int(np.prod(dimensions[i+1:])) for i in range(len(dimensions))]
+        self.__start = np.array(start)
+        self.__grid = np.zeros(int(np.prod(dimensions)), dtype=np.uint8)
+        self.__cells = memoryview(self.__grid)
+
+    def toAngles(self, idx):
+        coords = np.unravel_index(idx, self.__dimensions)
+        return tuple(int(self.__offsets[i] + coords[i] * self.__granularity) for i in range(len(coords)))
+
+    def refine(self, scale, coarsePath, radius):
+        """This function searches the level with the given scale, around coarsePath if there is one.
+           Returns the path as fine flat indices, or None.
+        """
+        levelDimensions = (self.__dimensions - 1) // scale + 1
+        span = int(levelDimensions.max())
+        while True:
+            if coarsePath is None or radius >= span:
+                corridor = self.getLevel(scale, levelDimensions)
+            else:
+                corridor = self.getCorridor(coarsePath, scale, radius, levelDimensions)
+            path = self.search(scale, corridor)
+            if path is not None or coarsePath is None or radius >= span:
+                return path
+            radius *= 2
+
+    def getLevel(self, scale, levelDimensions):
+        """This function returns the fine flat indices of every cell of the level
+        """
+        indices = np.zeros(1, dtype=np.int64)
+        for stride, dim in zip(self.__strides, levelDimensions):
+            indices = (indices[:, None] + np.arange(dim) * stride * scale).reshape(-1)
+        return indices
+
+    def getCorridor(self, coarsePath, scale, radius, levelDimensions):
+        """This function returns the fine flat indices of the level cells within radius (per axis)
+           of the coarser path
+        """
+        pathCoords = np.array(np.unravel_index(coarsePath, self.__dimensions)).T // scale
+        steps = np.arange(-radius, radius + 1)
+        moves = np.array(np.meshgrid(*[steps] * len(levelDimensions), indexing='ij')).reshape(len(levelDimensions), -1).T
+        corridor = (pathCoords[:, None, :] + moves[None, :, :]).reshape(-1, len(levelDimensions))
+        inside = np.all((corridor >= 0) & (corridor < levelDimensions), axis=1)
+        return np.unique(np.ravel_multi_index((corridor[inside] * scale).T, self.__dimensions))
+
+    def search(self, scale, indices):
+        """This function runs a BFS over the fine cells at the flat indices, moving scale fine cells at a time.
+        """
+        self.classify(indices)
+
+        allowedGrid = np.zeros(len(self.__grid), dtype=np.uint8)
+        allowedGrid[indices] = 1
+        allowed = memoryview(allowedGrid)
+        start = int(np.ravel_multi_index(tuple(self.__start // scale * scale), self.__dimensions))
+        allowed[start] = 1
+
+        cells = self.__cells
+        wall = ord(WALL_CHAR)
+        goal = ord(OBJECTIVE_CHAR)
+        axes = [(stride * scale, scale, stride, int(dim)) for stride, dim in zip(self.__strides, self.__dimensions)]
+        parent = {start: -1}
+        q = deque([start])
+        while q:
+            curr = q.popleft()
+            # The start cell is free whatever the arm touches there, like in transformToMaze
+            if cells[curr] == goal and curr != start:
+                path = []
+                while curr >= 0:
+                    path.append(curr)
+                    curr = parent[curr]
+                path.reverse()
+                return path
+            for step, move, stride, dim in axes:
+                k = curr // stride % dim
+                for n, inside in ((curr + step, k + move < dim), (curr - step, k >= move)):
+                    if inside and allowed[n] and n not in parent and cells[n] != wall:
+                        parent[n] = curr
+                        q.append(n)
+        return None
+
+    def classify(self, indices):
+        """This function classifies the fine cells at the flat indices that are still unknown
+        """
+        unknown = indices[self.__grid[indices] == 0]
+        for first in range(0, len(unknown), cspace.BLOCK_CELLS):
+            block = unknown[first:first + cspace.BLOCK_CELLS]
+            coords = np.array(np.unravel_index(block, self.__dimensions)).T
+            angles = self.__offsets + coords * self.__granularity
+            self.__grid[block] = cspace.classifyAngles(self.__arm, self.__goals, self.__obstacles, self.__window, angles)
+            stats.count(stats.CELLS_CLASSIFIED, len(block))
+
+    def getClassifiedCount(self):
+        return int(np.count_nonzero(self.__grid))
@@ -0,0 +1,123 @@
+# poseTable.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the table of arm poses used by the human mode of mp2.py.
+The keys move every angle by the granularity from its initial value, so the
+reachable poses form a lattice anchored at the initial angles. Every pose is
+classified once, on its first lookup or all at once with fill(), and later
+moves are a lookup in a flat bytearray.
+"""
+
+from const import *
+from geometry import doesArmTouchObjects, doesArmTipTouchGoals, isArmWithinWindow
+from spatialIndex import SceneIndex
+
+# Codes of the table, 0 is a pose not classified yet
+UNKNOWN = 0
+BLOCKED = 1
+FREE = 2
+GOAL = 3
+
+
+class PoseTable:
+    def __init__(self, arm, goals, obstacles, window, granularity):
+        # The poses are evaluated on a copy of the arm, which is never moved
+        self.__arm = arm.clone()
+        self.__goals = goals
+        self.__obstacles = obstacles
+        self.__window = window
+        self.__granularity = granularity
+        self.__index = SceneIndex(arm, goals, obstacles)
+
+        # lowest reachable angle and number of reachable angles of every link
+        self.__first = []
+        self.__dimensions = []
+        for angle, limit in zip(arm.getArmAngle(), arm.getArmLimit()):
+            below = (angle - min(limit)) // granularity
+            above = (max(limit) - angle) // granularity
+            self.__first.append(angle - below * granularity)
+            self.__dimensions.append(int(below + above + 1))
+
+        self.__strides = [1] * len(self.__dimensions)
+        for i in range(len(self.__dimensions) - 2, -1, -1):
+            self.__strides[i] = self.__strides[i+1] * self.__dimensions[i+1]
+        self.__codes = bytearray(self.__strides[0] * self.__dimensions[0])
+
+    # Returns the flat index of the pose, -1 if it is not on the lattice of the table
+    def getIndex(self, angles):
+        idx = 0
+        for angle, first, dimension, stride in zip(angles, self.__first, self.__dimensions, self.__strides):
+            step, rest = divmod(angle - first, self.__granularity)
+            if rest or step < 0 or step >= dimension:
+                return -1
+            idx += int(step) * stride
+        return idx
+
+    # Returns the angles of the flat index
+    def getAngles(self, idx):
+        angles = []
+        for first, dimension, stride in zip(self.__first, self.__dimensions, self.__strides):
+            angles.append(first + (idx // stride) % dimension * self.__granularity)
+        return tuple(angles)
+
+    def getDimensions(self):
+        return list(self.__dimensions)
+
+    def lookup(self, angles):
+        """This function returns BLOCKED, FREE or GOAL for the pose, only the angles of the arm links are used.
+           A pose off the lattice is BLOCKED.
+        """
+        idx = self.getIndex(angles)
+        if idx < 0:
+            return BLOCKED
+        code = self.__codes[idx]
+        if code == UNKNOWN:
+            code = self.classify(self.getAngles(idx))
+            self.__codes[idx] = code
+        return code
+
+    def classify(self, angles):
+        """This function applies the rules of the human mode to one pose. The arm may not touch an obstacle
+           or leave the window, and only its tip may touch a goal. GOAL means the tip reached a goal.
+        """
+        armPosDist = self.__arm.computeArmPosDist(angles)
+        if armPosDist is None:
+            return BLOCKED
+        armPos = [(start, end) for start, end, distance in armPosDist]
+        if self.__index.doesArmTouchObjects(armPosDist) or not isArmWithinWindow(armPos, self.__window):
+            return BLOCKED
+        if doesArmTipTouchGoals(armPos[-1][1], self.__goals):
+            return GOAL
+        if doesArmTouchObjects(armPosDist, self.__goals, isGoal=True):
+            return BLOCKED
+        return FREE
+
+    def fill(self):
+        """This function classifies every pose of the table at once with array operations
+        """
+        import numpy as np
+        import cspace
+
+        size = len(self.__codes)
+        distances = self.__arm.getArmDistance()
+        for first in range(0, size, cspace.BLOCK_CELLS):
+            block = np.arange(first, min(first + cspace.BLOCK_CELLS, size))
+            coords = np.unravel_index(block, self.__dimensions)
+            angleGrids = [self.__first[i] + coords[i] * self.__granularity for i in range(len(coords))]
+            armPos = cspace.computeArmPosGrid(self.__arm.getBase(), self.__arm.getArmLength(), angleGrids)
+            shape = block.shape
+
+            blocked = cspace.getObstacleMask(armPos, distances, self.__obstacles, shape)
+            blocked |= cspace.getWindowMask(armPos, self.__window, shape)
+            tipGoal = cspace.getGoalMask(armPos, self.__goals, shape)
+            linkGoal = cspace.getObstacleMask(armPos, [0] * len(distances), self.__goals, shape)
+            codes = np.where(blocked, BLOCKED, np.where(tipGoal, GOAL, np.where(linkGoal, BLOCKED, FREE)))
+            self.__codes[first:first + len(block)] = codes.astype(np.uint8).tobytes()
+
+    def getClassifiedCount(self):
+        return len(self.__codes) - self.__codes.count(UNKNOWN)
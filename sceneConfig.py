@@ -0,0 +1,76 @@
+# sceneConfig.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the reader of the map configuration files. Every value is parsed
+as a Python literal (tuples, lists and numbers), never evaluated as code. All the
+sections of a file are parsed at once and kept until the file changes.
+"""
+
+import ast
+import configparser
+import os
+
+# Parsed files, path -> ((modification time, size), {section: {option: value}})
+CONFIG_CACHE = {}
+
+
+def parseConfig(configfile):
+    """Parse every section of a configuration file.
+
+        Args:
+            configfile (str): path of the configuration file
+
+        Return:
+            dict: {map name: {option: value}}, option names keep their case (ArmBase, ArmLinks, ...)
+    """
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    if not config.read(configfile):
+        print("Cannot read " + configfile)
+        raise SystemExit
+
+    sections = {}
+    for map_name in config.sections():
+        options = {}
+        for option, text in config.items(map_name):
+            try:
+                options[option] = ast.literal_eval(text.strip())
+            except (ValueError, SyntaxError):
+                print("Cannot parse " + option + " of " + map_name + " in " + configfile)
+                raise SystemExit
+        sections[map_name] = options
+    return sections
+
+
+def loadConfig(configfile):
+    """This function returns parseConfig(configfile), parsed again only when the file changed
+    """
+    path = os.path.abspath(configfile)
+    try:
+        info = os.stat(path)
+        version = (info.st_mtime_ns, info.st_size)
+    except OSError:
+        version = None
+    cached = CONFIG_CACHE.get(path)
+    if cached is None or version is None or cached[0] != version:
+        cached = (version, parseConfig(configfile))
+        CONFIG_CACHE[path] = cached
+    return cached[1]
+
+
+def getScene(configfile, map_name):
+    """This function returns the options of one map of a configuration file.
+
+        Return:
+            dict: Window, ArmBase, ArmLinks, Obstacles and Goals of the map
+    """
+    sections = loadConfig(configfile)
+    if map_name not in sections:
+        print("Map " + map_name + " is not in " + configfile)
+        raise SystemExit
+    return sections[map_name]
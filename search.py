@@ -18,69 +18,134 @@ This file contains search functions.
 # searchMethod is the search method specified by --method flag (bfs,astar)
 # You may need to slight change your previous search functions in MP1 since this is 3-d maze
 
+from array import array
 from collections import deque
 from heapq import heappop, heappush
+import stats
 
 def search(maze, searchMethod):
-    return {
-        "bfs": bfs,
-    }.get(searchMethod, [])(maze)
+    with stats.stage("search"):
+        return {
+            "bfs": bfs,
+            "astar": astar,
+        }.get(searchMethod, [])(maze)
+
+def tracePath(maze, parent, curr):
+    """
+    This function follows the parent array from the flat index curr back to the start
+    and returns the path of angles from the start to curr.
+    """
+    path = []
+    while curr >= 0:
+        path.append(maze.idx_to_angle(curr))
+        curr = parent[curr]
+    path.reverse()  # backtrace
+    return path
 
 def bfs(maze):
-    # Write your code here
     """
-    This function returns optimal path in a list, which contains start and objective.
-    If no path found, return None. 
+    This function returns optimal path in a list, which contains start and objective,
+    and the number of states explored. If no path found, the path is None.
+
+    Nodes are flat maze indices, the visited set is a bytearray and the parents an int32 array,
+    so the search runs in time linear in the number of free cells.
     """
+    size = maze.get_size()
+    start = maze.angle_to_idx(maze.getStart())
+    goal = maze.get_goal_mask()
+    visited = bytearray(size)
+    parent = array('i', [-1]) * size
 
-    q = []
-    visited = {}
-    keys = {}
-    selected = None
-    # print("mazestart", maze.getStart())
-    q.append(maze.getStart())
-    # print(q)
-    found = False
-    while len(q) > 0:
-        curr = q.pop(0)
-        # print(curr)
-        if maze.isObjective(curr[0], curr[1]):
-            selected = curr
-            found = True
-            break
-        # print(curr[0], curr[1])
-        neighbors = maze.getNeighbors(curr[0], curr[1])
-        # print("neighbors", neighbors)
-        for n in neighbors:
-            if n not in visited:
-                # print("neighbors", n)
-                visited[n] = True
+    # The first objective reached is the first one popped, so it is taken as soon as it is queued
+    selected = start if goal[start] else -1
+    visited[start] = 1
+    q = deque([start])
+    explored = 0
+    track = stats.isEnabled()
+    peak = 1
+    while q and selected < 0:
+        if track and len(q) > peak:
+            peak = len(q)
+        curr = q.popleft()
+        explored += 1
+        for n in maze.neighbors_idx(curr):
+            if not visited[n]:
+                visited[n] = 1
+                parent[n] = curr
                 q.append(n)
-                keys[n] = curr
-
-                if maze.isObjective(n[0], n[1]):
+                if goal[n]:
                     selected = n
-                    found = True
                     break
 
-    curr = selected
-    path = []
-    while curr != maze.getStart():
-        # print(curr)
-        # print(keys)
-        path.append(curr)
-        curr = keys[curr]
+    stats.count(stats.NODES_EXPANDED, explored)
+    stats.peak(stats.PEAK_FRONTIER, peak)
+    if selected < 0:
+        return None, explored
 
-    path.append(curr)
-    path.reverse()  # backtrace
-    # print(path)
+    return tracePath(maze, parent, selected), explored
+
+def getHeuristic(maze, goal):
+    """
+    This function returns, for every flat index, the number of single angle moves to the nearest
+    objective when walls are ignored (the angular Manhattan distance). It never overestimates the
+    true distance and it is consistent. The table is a distance transform of the goal mask,
+    computed with a forward and a backward sweep along every axis.
+    """
+    import numpy as np
+    dimensions = maze.getDimensions()
+    far = sum(dimensions)
+    dist = np.where(np.frombuffer(goal, dtype=np.uint8).reshape(dimensions) != 0, 0, far).astype(np.int32)
+    for axis in range(len(dimensions)):
+        sweep = np.moveaxis(dist, axis, 0)
+        for k in range(1, sweep.shape[0]):
+            sweep[k] = np.minimum(sweep[k], sweep[k-1] + 1)
+        for k in range(sweep.shape[0] - 2, -1, -1):
+            sweep[k] = np.minimum(sweep[k], sweep[k+1] + 1)
+    return memoryview(dist.reshape(-1))
 
-    # if not path:
-    # return None
+def astar(maze):
+    """
+    This function returns optimal path in a list, which contains start and objective,
+    and the number of states explored. If no path found, the path is None.
+
+    The heuristic is the angular (Manhattan) distance to the nearest objective, in moves.
+    """
+    size = maze.get_size()
+    start = maze.angle_to_idx(maze.getStart())
+    goal = maze.get_goal_mask()
+    heuristic = getHeuristic(maze, goal)
+    closed = bytearray(size)
+    cost = array('i', [-1]) * size
+    parent = array('i', [-1]) * size
 
-    if not found:
-        return None
+    cost[start] = 0
+    h = heuristic[start]
+    # (f, h, idx), ties go to the node closer to an objective
+    frontier = [(h, h, start)]
+    explored = 0
+    track = stats.isEnabled()
+    peak = 1
+    while frontier:
+        if track and len(frontier) > peak:
+            peak = len(frontier)
+        _, _, curr = heappop(frontier)
+        if closed[curr]:
+            continue
+        if goal[curr]:
+            stats.count(stats.NODES_EXPANDED, explored)
+            stats.peak(stats.PEAK_FRONTIER, peak)
+            return tracePath(maze, parent, curr), explored
+        closed[curr] = 1
+        explored += 1
 
-    return path
+        g = cost[curr] + 1
+        for n in maze.neighbors_idx(curr):
+            if not closed[n] and (cost[n] < 0 or g < cost[n]):
+                cost[n] = g
+                parent[n] = curr
+                h = heuristic[n]
+                heappush(frontier, (g + h, h, n))
 
-    # return []
\ No newline at end of file
+    stats.count(stats.NODES_EXPANDED, explored)
+    stats.peak(stats.PEAK_FRONTIER, peak)
+    return None, explored
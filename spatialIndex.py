@@ -0,0 +1,165 @@
+# spatialIndex.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a uniform grid index over circles (obstacles or goals) and the
+reach based culling of circles that an arm link can never touch. They give the same
+answers as the plain scans in geometry.py while testing only the nearby circles.
+"""
+
+import math
+from geometry import findDist
+import stats
+
+# Slack added to the culling distances, covers the rounding of the distance computations
+CULL_SLACK = 1
+
+
+class CircleGrid:
+    # Uniform grid of square buckets, every circle is listed in the buckets its bounding box overlaps
+    def __init__(self, circles, cellSize=None):
+        self.circles = list(circles)
+        if cellSize is None:
+            cellSize = max([2 * circle[2] for circle in self.circles] + [1])
+        self.cellSize = cellSize
+        self.buckets = {}
+        for i, (x, y, r) in enumerate(self.circles):
+            for key in self.__keys(x - r, y - r, x + r, y + r):
+                self.buckets.setdefault(key, []).append(i)
+        # Range of the occupied buckets, queries never look outside of it
+        if self.buckets:
+            self.bounds = (min(kx for kx, _ in self.buckets), min(ky for _, ky in self.buckets),
+                           max(kx for kx, _ in self.buckets), max(ky for _, ky in self.buckets))
+        else:
+            self.bounds = None
+
+    def __keys(self, xmin, ymin, xmax, ymax, bounds=None):
+        size = self.cellSize
+        kxmin, kymin = int(math.floor(xmin / size)), int(math.floor(ymin / size))
+        kxmax, kymax = int(math.floor(xmax / size)), int(math.floor(ymax / size))
+        if bounds is not None:
+            kxmin, kymin = max(kxmin, bounds[0]), max(kymin, bounds[1])
+            kxmax, kymax = min(kxmax, bounds[2]), min(kymax, bounds[3])
+        for kx in range(kxmin, kxmax + 1):
+            for ky in range(kymin, kymax + 1):
+                yield (kx, ky)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """This function returns the sorted indices of the circles whose bounding box may overlap the box
+        """
+        if self.bounds is None:
+            return []
+        found = set()
+        for key in self.__keys(xmin, ymin, xmax, ymax, self.bounds):
+            found.update(self.buckets.get(key, ()))
+        return sorted(found)
+
+
+def getLinkReach(arm):
+    """This function returns (min, max) distance from the arm base of any point of every link.
+       The link end offsets are truncated toward zero, so no link is longer than its length.
+    """
+    lengths = arm.getArmLength()
+    reach = []
+    for i in range(len(lengths)):
+        outer = sum(lengths[:i+1])
+        # the first link end is at least length - sqrt(2) away after truncation
+        inner = 0 if i == 0 else max(0, lengths[0] - math.sqrt(2) - sum(lengths[1:i+1]))
+        reach.append((inner, outer))
+    return reach
+
+
+def canReach(reach, armBase, circle, pad):
+    """This function returns False if the circle, grown by pad, is outside the annulus reach around armBase
+    """
+    dist = math.sqrt((circle[0] - armBase[0]) ** 2 + (circle[1] - armBase[1]) ** 2)
+    gap = max(dist - reach[1], reach[0] - dist)
+    return gap <= circle[2] + pad + CULL_SLACK
+
+
+def cullObstacles(arm, obstacles):
+    """This function returns, for every link, the obstacles that the link can touch at some angle.
+    """
+    armBase = arm.getBase()
+    return [[obstacle for obstacle in obstacles if canReach(reach, armBase, obstacle, pad)]
+            for reach, pad in zip(getLinkReach(arm), arm.getArmDistance())]
+
+
+def cullScene(arm, obstacles):
+    """This function drops the obstacles that no link of the arm can touch, keeping their order
+    """
+    armBase = arm.getBase()
+    links = list(zip(getLinkReach(arm), arm.getArmDistance()))
+    return [obstacle for obstacle in obstacles if any(canReach(reach, armBase, obstacle, pad) for reach, pad in links)]
+
+
+class SceneIndex:
+    # Per link grids of the obstacles that link can reach, and a grid of the goals,
+    # for the per configuration tests of transform.classifyConfig
+    def __init__(self, arm, goals, obstacles):
+        self.__obstacles = [CircleGrid(linkObstacles) for linkObstacles in cullObstacles(arm, obstacles)]
+        self.__goals = CircleGrid(goals)
+
+    def doesArmTouchObjects(self, armPosDist):
+        """Same result as geometry.doesArmTouchObjects(armPosDist, obstacles)
+        """
+        for arm, grid in zip(armPosDist, self.__obstacles):
+            start, end, pad = arm
+            grow = pad + CULL_SLACK
+            candidates = grid.query(min(start[0], end[0]) - grow, min(start[1], end[1]) - grow,
+                                    max(start[0], end[0]) + grow, max(start[1], end[1]) + grow)
+            for tests, i in enumerate(candidates, 1):
+                obj = grid.circles[i]
+                if findDist(arm, (obj[0], obj[1])) - obj[2] - pad <= 0:
+                    stats.count(stats.COLLISION_TESTS, tests)
+                    return True
+            stats.count(stats.COLLISION_TESTS, len(candidates))
+        return False
+
+    def getLinkClearance(self, armPosDist, limits):
+        """This function returns the smallest findDist - r - padding of every link to the obstacles it can reach,
+           or the limit of the link when that is smaller. The link touches an obstacle if it is <= 0, and the
+           measuring stops at the first such link, as in doesArmTouchObjects. Only the circles whose bounds
+           come within pad + limit of a link are measured, nearest bounds first.
+        """
+        clearance = []
+        for arm, grid, limit in zip(armPosDist, self.__obstacles, limits):
+            start, end, pad = arm
+            grow = pad + limit + CULL_SLACK
+            candidates = grid.query(min(start[0], end[0]) - grow, min(start[1], end[1]) - grow,
+                                    max(start[0], end[0]) + grow, max(start[1], end[1]) + grow)
+            # No point of the link is nearer to a center than the bounding box of the link
+            bounds = []
+            for i in candidates:
+                x, y, r = grid.circles[i]
+                dx = max(min(start[0], end[0]) - x, x - max(start[0], end[0]), 0)
+                dy = max(min(start[1], end[1]) - y, y - max(start[1], end[1]), 0)
+                bounds.append((math.sqrt(dx * dx + dy * dy) - r - pad, i))
+            bounds.sort()
+            linkClearance = limit
+            tests = 0
+            for bound, i in bounds:
+                if bound >= linkClearance:
+                    break
+                tests += 1
+                obj = grid.circles[i]
+                linkClearance = min(linkClearance, findDist(arm, (obj[0], obj[1])) - obj[2] - pad)
+                if linkClearance <= 0:
+                    stats.count(stats.COLLISION_TESTS, tests)
+                    return clearance + [linkClearance]
+            stats.count(stats.COLLISION_TESTS, tests)
+            clearance.append(linkClearance)
+        return clearance
+
+    def doesArmTipTouchGoals(self, armEnd):
+        """Same result as geometry.doesArmTipTouchGoals(armEnd, goals)
+        """
+        for i in self.__goals.query(armEnd[0], armEnd[1], armEnd[0], armEnd[1]):
+            goal = self.__goals.circles[i]
+            if math.sqrt(((armEnd[0] - goal[0]) ** 2) + ((armEnd[1] - goal[1]) ** 2)) <= goal[2]:
+                return True
+        return False
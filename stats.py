@@ -0,0 +1,140 @@
+# stats.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the optional instrumentation of the planner. Once enabled, the
+stages (config parse, transform, maze scan, search, playback) record their wall time
+and the hot paths add to named counters. While disabled, every call returns after
+checking one module variable.
+"""
+
+import contextlib
+import time
+
+# Counter names used across the modules
+CELLS_CLASSIFIED = "cellsClassified"
+COLLISION_TESTS = "collisionTests"
+NODES_EXPANDED = "nodesExpanded"
+PEAK_FRONTIER = "peakFrontier"
+
+
+class Stats:
+    # Wall time and number of runs of every stage, and named counters, in the order they were first seen
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.counters = {}
+
+    def addTime(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name, value):
+        self.counters[name] = max(self.counters.get(name, value), value)
+
+    def asDict(self):
+        """This function returns the stats as plain dicts, times in seconds
+        """
+        return {"times": dict(self.times), "calls": dict(self.calls), "counters": dict(self.counters)}
+
+    def report(self):
+        """This function returns the stats as printable lines
+        """
+        lines = []
+        for name, seconds in self.times.items():
+            lines.append("%-16s %10.6f s  (%d run%s)" % (name, seconds, self.calls[name],
+                                                          "" if self.calls[name] == 1 else "s"))
+        for name, value in self.counters.items():
+            lines.append("%-16s %10d" % (name, value))
+        return "\n".join(lines)
+
+
+class Stage:
+    # Context manager adding the wall time of its block to a stage of the stats
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.addTime(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NoStage:
+    # Context manager doing nothing, used while the stats are disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_STAGE = NoStage()
+
+# The Stats being recorded, None while disabled
+current = None
+
+
+def enable():
+    """This function starts recording into new Stats and returns them
+    """
+    global current
+    current = Stats()
+    return current
+
+
+def disable():
+    """This function stops recording and returns the Stats recorded so far, None if they were not enabled
+    """
+    global current
+    stats, current = current, None
+    return stats
+
+
+@contextlib.contextmanager
+def suspended():
+    """This function returns a context manager whose block is not recorded, like work done only for output
+    """
+    global current
+    stats, current = current, None
+    try:
+        yield
+    finally:
+        current = stats
+
+
+def isEnabled():
+    return current is not None
+
+
+def getStats():
+    return current
+
+
+def stage(name):
+    """This function returns a context manager timing its block as the stage name
+    """
+    if current is None:
+        return NO_STAGE
+    return Stage(current, name)
+
+
+def count(name, value=1):
+    if current is not None:
+        current.count(name, value)
+
+
+def peak(name, value):
+    if current is not None:
+        current.peak(name, value)
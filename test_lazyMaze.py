@@ -0,0 +1,26 @@
+from arm import Arm
+from lazyMaze import LazyMaze
+from sceneConfig import getScene
+from transform import transformToMaze
+
+
+def loadScene(configfile, map_name):
+    scene = getScene(configfile, map_name)
+    return Arm(scene['ArmBase'], scene['ArmLinks']), scene['Goals'], scene['Obstacles'], scene['Window']
+
+
+def test_init_classifies_only_goal_cells():
+    arm, goals, obstacles, window = loadScene("test_config_part4.txt", "Test1")
+    maze = LazyMaze(arm, goals, obstacles, window, 2)
+    assert maze.get_classified_count() * 100 < maze.get_size()
+
+    full = transformToMaze(arm.clone(), goals, obstacles, window, 2)
+    assert sorted(maze.getObjectives()) == sorted(full.getObjectives())
+
+
+def test_objectives_match_full_maze():
+    arm, goals, obstacles, window = loadScene("test_config.txt", "Test2")
+    maze = LazyMaze(arm, goals, obstacles, window, 1)
+    full = transformToMaze(arm.clone(), goals, obstacles, window, 1)
+    assert maze.getObjectives() == full.getObjectives()
+    assert maze.toMaze().get_cells() == full.get_cells()
@@ -0,0 +1,39 @@
+from arm import Arm
+from const import *
+from maze import Maze
+from mazeFile import loadTextMaze, loadMazeFile, saveMazeFile
+from sceneConfig import getScene
+from transform import transformToMaze
+
+
+def roundTrip(tmp_path, maze):
+    text = str(tmp_path / "maze.txt")
+    maze.saveToFile(text)
+    loaded = loadTextMaze(text, maze.offsets, maze.granularity)
+    assert loaded.getDimensions() == maze.getDimensions()
+    assert bytes(loaded.get_cells()) == bytes(maze.get_cells())
+    assert loaded.getStart() == maze.getStart()
+    assert loaded.getObjectives() == maze.getObjectives()
+
+    binary = str(tmp_path / "maze.maze")
+    saveMazeFile(maze, binary)
+    loaded = loadMazeFile(binary)
+    assert bytes(loaded.get_cells()) == bytes(maze.get_cells())
+
+
+def test_one_link_round_trip(tmp_path):
+    scene = getScene("test_config_part4.txt", "Test2")
+    arm = Arm(scene['ArmBase'], scene['ArmLinks'])
+    maze = transformToMaze(arm, scene['Goals'], scene['Obstacles'], scene['Window'], 5)
+    assert len(maze.getDimensions()) == 1
+    roundTrip(tmp_path, maze)
+
+
+def test_single_gamma_round_trip(tmp_path):
+    cells = [SPACE_CHAR] * 12
+    cells[0] = START_CHAR
+    cells[7] = OBJECTIVE_CHAR
+    cells[9] = WALL_CHAR
+    maze = Maze("".join(cells).encode(), [0, -30, 90], 10, [3, 4, 1])
+    roundTrip(tmp_path, maze)
+    assert maze.getObjectives() == [(10, 0, 90)]
@@ -1,27 +1,24 @@
 import search as search_student
 import geometry as geometry_student
-import transform as transform_student
 import maze as maze_student
+import mazeCache
 
 from arm import Arm
 from const import *
+from sceneConfig import getScene
 import time
-import configparser
-import copy
 import math
 
 def build_maze_basic(configfile, map_name):
-	config = configparser.ConfigParser()
-
     # set 'data/' to you config directory
-	config.read('data/' + configfile)
-	window = eval(config.get(map_name, 'Window'))
-	armBase = eval(config.get(map_name, 'ArmBase'))
-	armLinks = eval(config.get(map_name, 'ArmLinks'))
+	scene = getScene('data/' + configfile, map_name)
+	window = scene['Window']
+	armBase = scene['ArmBase']
+	armLinks = scene['ArmLinks']
 
 	arm1 = Arm(armBase, armLinks)
-	obstacles = eval(config.get(map_name, 'Obstacles'))
-	goals = eval(config.get(map_name, 'Goals'))
+	obstacles = scene['Obstacles']
+	goals = scene['Goals']
 
 	return arm1, goals, obstacles, window
 
@@ -31,11 +28,11 @@ configfile, map_name, granularity = "test_config_part4.txt", "Test1", 10
 # configfile, map_name, granularity = "test_config.txt", "Test2", 5
 
 arm, goals, obstacles, window = build_maze_basic(configfile, map_name)
-arm_student = copy.deepcopy(arm)
-student_maze = transform_student.transformToMaze(
+arm_student = arm.clone()
+student_maze = mazeCache.transformToMazeCached(
     arm_student, goals, obstacles, window, granularity
 )
 
-student_path = search_student.search(student_maze, "bfs")
+student_path, student_explored = search_student.search(student_maze, "bfs")
 
 print(student_path)
@@ -0,0 +1,25 @@
+from arm import Arm
+from sceneConfig import getScene
+from search import search
+from transform import transformToMaze, validatePath
+
+
+def loadScene(configfile, map_name):
+    scene = getScene(configfile, map_name)
+    return Arm(scene['ArmBase'], scene['ArmLinks']), scene['Goals'], scene['Obstacles'], scene['Window']
+
+
+def test_validate_path_matches_maze():
+    arm, goals, obstacles, window = loadScene("test_config.txt", "Test1")
+    maze = transformToMaze(arm.clone(), goals, obstacles, window, 5)
+    path, _ = search(maze, "bfs")
+    assert validatePath(arm, path, goals, obstacles, window, 5) == maze.isValidPath(path) == "Valid"
+    assert validatePath(arm, path[:-1], goals, obstacles, window, 5) == maze.isValidPath(path[:-1])
+
+
+def test_validate_path_rejects_teleport():
+    arm, goals, obstacles, window = loadScene("test_config.txt", "Test1")
+    maze = transformToMaze(arm.clone(), goals, obstacles, window, 5)
+    path, _ = search(maze, "bfs")
+    teleport = [path[0], path[-1]]
+    assert validatePath(arm, teleport, goals, obstacles, window, 5) == maze.isValidPath(teleport) == "Not single hop"
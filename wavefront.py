@@ -0,0 +1,122 @@
+# wavefront.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the goal wavefront of a maze. One breadth first search from all
+the objectives at once gives every cell its number of moves to the nearest objective
+and the next cell on the way there. A path from any start is then read off the field
+without searching, and it is as long as the path bfs finds.
+"""
+
+from array import array
+from collections import deque
+import stats
+
+
+def buildWavefront(maze):
+    """Run a breadth first search from every objective of the maze.
+
+        Args:
+            maze (Maze): maze with all its cells known, a LazyMaze has to be turned into a Maze first
+
+        Return:
+            (distances, nextHops, explored): int32 arrays over the flat indices, -1 for the cells that
+            reach no objective, nextHops is also -1 at the objectives. explored is the number of cells expanded.
+    """
+    size = maze.get_size()
+    distances = array('i', [-1]) * size
+    nextHops = array('i', [-1]) * size
+
+    q = deque()
+    for objective in maze.getObjectives():
+        idx = maze.angle_to_idx(objective)
+        if idx >= 0 and distances[idx] < 0:
+            distances[idx] = 0
+            q.append(idx)
+
+    # Free neighbors are symmetric, so the moves toward the objectives are the moves of the search reversed
+    explored = 0
+    track = stats.isEnabled()
+    peak = len(q)
+    while q:
+        if track and len(q) > peak:
+            peak = len(q)
+        curr = q.popleft()
+        explored += 1
+        step = distances[curr] + 1
+        for n in maze.neighbors_idx(curr):
+            if distances[n] < 0:
+                distances[n] = step
+                nextHops[n] = curr
+                q.append(n)
+
+    stats.count(stats.NODES_EXPANDED, explored)
+    stats.peak(stats.PEAK_FRONTIER, peak)
+    return distances, nextHops, explored
+
+
+class Wavefront:
+    # Builds the field of the maze, or wraps distances and nextHops of buildWavefront read back from a cache.
+    # The start of the maze is read on every query, so Maze.setStart moves the default start.
+    def __init__(self, maze, distances=None, nextHops=None):
+        self.__maze = maze
+        self.__explored = 0
+        if distances is None or nextHops is None:
+            with stats.stage("wavefront"):
+                distances, nextHops, self.__explored = buildWavefront(maze)
+        self.__distances = distances
+        self.__nextHops = nextHops
+
+    # Returns the flat index of the start, first hop and number of moves of the start, -1 if there is no path.
+    # A start on a wall still moves to its free neighbors, like bfs does.
+    def __getFirstHop(self, start):
+        idx = self.__maze.angle_to_idx(start)
+        if idx < 0:
+            return idx, -1, -1
+        if self.__distances[idx] >= 0 or self.__maze.is_free_idx(idx):
+            return idx, self.__nextHops[idx], self.__distances[idx]
+        best = -1
+        for n in self.__maze.neighbors_idx(idx):
+            if self.__distances[n] >= 0 and (best < 0 or self.__distances[n] < self.__distances[best]):
+                best = n
+        return idx, best, self.__distances[best] + 1 if best >= 0 else -1
+
+    def getDistance(self, start=None):
+        """This function returns the number of moves from the start to the nearest objective,
+           -1 if no objective can be reached. The start defaults to the start of the maze.
+        """
+        return self.__getFirstHop(self.__maze.getStart() if start is None else start)[2]
+
+    def isReachable(self, start=None):
+        return self.getDistance(start) >= 0
+
+    def getPath(self, start=None):
+        """This function follows the next hops from the start down to an objective.
+
+            Return:
+                list of angles from the start to the objective, None if no objective can be reached
+        """
+        curr, hop, distance = self.__getFirstHop(self.__maze.getStart() if start is None else start)
+        if distance < 0:
+            return None
+        path = [self.__maze.idx_to_angle(curr)]
+        while distance > 0:
+            curr = hop
+            hop = self.__nextHops[curr]
+            distance -= 1
+            path.append(self.__maze.idx_to_angle(curr))
+        return path
+
+    # Returns the number of cells expanded to build the field, 0 when it was read from a cache
+    def getExploredCount(self):
+        return self.__explored
+
+    def getDistances(self):
+        return self.__distances
+
+    def getNextHops(self):
+        return self.__nextHops